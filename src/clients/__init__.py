@@ -0,0 +1,16 @@
+from .airflow import AirflowClient, airflow
+from .http import SharedAsyncClient
+from .pocketbase import PocketBaseClient, any_of, pocketbase, quote
+from .powerbi import PowerBIClient, powerbi
+
+__all__ = [
+    "SharedAsyncClient",
+    "PocketBaseClient",
+    "pocketbase",
+    "any_of",
+    "quote",
+    "PowerBIClient",
+    "powerbi",
+    "AirflowClient",
+    "airflow",
+]
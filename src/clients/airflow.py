@@ -0,0 +1,112 @@
+import base64
+import logging
+import time
+import httpx
+from config import settings
+from utils.singleflight import SingleFlight
+from .http import SharedAsyncClient
+
+logger = logging.getLogger(__name__)
+
+# Endpoint leve usado para descobrir qual autenticação o Airflow aceita
+AUTH_PROBE_PATH = "/api/v1/dags"
+
+
+def _basic(username: str, password: str) -> str:
+    credentials = base64.b64encode(f"{username}:{password}".encode()).decode()
+    return f"Basic {credentials}"
+
+
+class AirflowClient(SharedAsyncClient):
+    """
+    Cliente HTTP do Airflow compartilhado pelo processo.
+
+    A autenticação aceita pelo servidor (credenciais configuradas ou Basic em
+    branco) é descoberta uma única vez e reutilizada; um 401 posterior
+    dispara nova negociação e uma única repetição da requisição.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._authorization: str | None = None
+        # Após uma negociação sem sucesso, não sonda de novo até este instante
+        self._retry_at: float = 0.0
+        self._inflight = SingleFlight()
+
+    def _build(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=settings.AIRFLOW_URL,
+            verify=settings.AIRFLOW_VERIFY_SSL,
+            headers={"Content-Type": "application/json"},
+            limits=httpx.Limits(
+                max_connections=settings.AIRFLOW_POOL_SIZE,
+                max_keepalive_connections=settings.AIRFLOW_POOL_SIZE,
+            ),
+            timeout=httpx.Timeout(
+                settings.AIRFLOW_READ_TIMEOUT,
+                connect=settings.AIRFLOW_CONNECT_TIMEOUT,
+            ),
+        )
+
+    @staticmethod
+    def _candidates() -> list[str]:
+        username = settings.AIRFLOW_USERNAME if settings.AIRFLOW_USERNAME else "admin"
+        password = settings.AIRFLOW_PASSWORD if settings.AIRFLOW_PASSWORD else "admin"
+        return [_basic(username, password), _basic("", "")]
+
+    async def negotiate_auth(self) -> str:
+        """Descobre a autenticação aceita (chamadas simultâneas compartilham)."""
+        if time.monotonic() < self._retry_at:
+            return self._candidates()[0]
+        return await self._inflight.do_async("auth", self._negotiate)
+
+    async def _negotiate(self) -> str:
+        candidates = self._candidates()
+        for authorization in candidates:
+            response = await self.client.get(
+                AUTH_PROBE_PATH,
+                params={"limit": 1},
+                headers={"Authorization": authorization},
+            )
+            if response.status_code != 401:
+                self._authorization = authorization
+                return authorization
+
+        # Nenhuma aceita: usa as credenciais configuradas sem memorizá-las e
+        # só sonda de novo após o intervalo de espera
+        self._authorization = None
+        self._retry_at = time.monotonic() + settings.AIRFLOW_AUTH_RETRY_SECONDS
+        return candidates[0]
+
+    async def prepare(self) -> None:
+        """Negocia a autenticação na inicialização, sem derrubar a aplicação."""
+        try:
+            await self.negotiate_auth()
+        except httpx.HTTPError:
+            logger.warning("Airflow indisponível; autenticação negociada no 1º uso")
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        authorization = self._authorization or await self.negotiate_auth()
+        response = await self._send(method, path, authorization, **kwargs)
+
+        if response.status_code == 401:
+            # Credenciais mudaram no servidor: renegocia e repete uma vez
+            self._authorization = None
+            renegotiated = await self.negotiate_auth()
+            if renegotiated != authorization:
+                response = await self._send(method, path, renegotiated, **kwargs)
+        return response
+
+    async def _send(
+        self, method: str, path: str, authorization: str, **kwargs
+    ) -> httpx.Response:
+        headers = {**kwargs.pop("headers", {}), "Authorization": authorization}
+        return await self.client.request(method, path, headers=headers, **kwargs)
+
+    async def aclose(self) -> None:
+        self._authorization = None
+        self._retry_at = 0.0
+        await super().aclose()
+
+
+airflow = AirflowClient()
@@ -0,0 +1,47 @@
+import threading
+import httpx
+
+
+class SharedAsyncClient:
+    """
+    Cliente httpx assíncrono compartilhado pelo processo, criado no primeiro
+    uso. Subclasses definem base URL, pool e timeouts em `_build`.
+    """
+
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+        self._lock = threading.Lock()
+
+    def _build(self) -> httpx.AsyncClient:
+        raise NotImplementedError
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Retorna o cliente subjacente, criando-o no primeiro uso."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._build()
+        return self._client
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        return await self.client.request(method, path, **kwargs)
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    async def patch(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("PATCH", path, **kwargs)
+
+    async def delete(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("DELETE", path, **kwargs)
+
+    async def aclose(self) -> None:
+        """Fecha as conexões do pool (chamado no shutdown da aplicação)."""
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
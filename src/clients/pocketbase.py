@@ -0,0 +1,169 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator
+import httpx
+from config import settings
+from .http import SharedAsyncClient
+
+
+def quote(value: str) -> str:
+    """Escapa um valor para uso como string literal em filtros do PocketBase."""
+    escaped = str(value).replace("\\", "\\\\").replace("'", "\\'")
+    return f"'{escaped}'"
+
+
+def any_of(field: str, values) -> str:
+    """Monta o filtro `(field='a' || field='b' ...)` para os valores dados."""
+    return "(" + " || ".join(f"{field}={quote(value)}" for value in values) + ")"
+
+
+class PocketBaseClient(SharedAsyncClient):
+    """
+    Cliente HTTP do PocketBase compartilhado pelo processo, com pool de
+    conexões keep-alive e timeouts configurados em `config.settings`.
+    """
+
+    def _build(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=settings.POCKETBASE_URL,
+            verify=settings.POCKETBASE_VERIFY_SSL,
+            limits=httpx.Limits(
+                max_connections=settings.POCKETBASE_POOL_SIZE,
+                max_keepalive_connections=settings.POCKETBASE_POOL_SIZE,
+            ),
+            timeout=httpx.Timeout(
+                settings.POCKETBASE_READ_TIMEOUT,
+                connect=settings.POCKETBASE_CONNECT_TIMEOUT,
+            ),
+        )
+
+    async def iter_pages(
+        self, collection: str, **params
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Percorre as páginas de uma coleção sob demanda, já buscando a página
+        seguinte enquanto a atual é consumida.
+        """
+        # Acima do limite o servidor corta a página e a paginação pararia cedo
+        per_page = min(settings.POCKETBASE_PAGE_SIZE, settings.POCKETBASE_MAX_PER_PAGE)
+
+        async def fetch(page: int) -> list[dict]:
+            response = await self.get(
+                f"/api/collections/{collection}/records",
+                params={**params, "page": page, "perPage": per_page, "skipTotal": 1},
+            )
+            response.raise_for_status()
+            return response.json().get("items", [])
+
+        page = 1
+        pending = asyncio.create_task(fetch(page))
+        try:
+            while pending is not None:
+                items = await pending
+                pending = None
+                if len(items) == per_page:
+                    page += 1
+                    pending = asyncio.create_task(fetch(page))
+                yield items
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def list_all(self, collection: str, **params) -> list[dict]:
+        """Retorna todos os registros de uma coleção, percorrendo as páginas."""
+        items: list[dict] = []
+        async for page in self.iter_pages(collection, **params):
+            items.extend(page)
+        return items
+
+    async def list_any(
+        self, collection: str, field: str, values, filter: str = "", **params
+    ) -> list[dict]:
+        """
+        Retorna os registros cujo `field` está em `values`, com filtros OR
+        divididos em blocos consultados em paralelo (no máximo
+        `POCKETBASE_MAX_CONCURRENCY` blocos por vez).
+        """
+        values = list(dict.fromkeys(values))
+        chunk_size = settings.POCKETBASE_FILTER_CHUNK_SIZE
+        filters = [
+            any_of(field, values[start : start + chunk_size])
+            for start in range(0, len(values), chunk_size)
+        ]
+        if filter:
+            filters = [f"{filter} && {chunk_filter}" for chunk_filter in filters]
+
+        semaphore = asyncio.Semaphore(settings.POCKETBASE_MAX_CONCURRENCY)
+
+        async def fetch(chunk_filter: str) -> list[dict]:
+            async with semaphore:
+                return await self.list_all(collection, filter=chunk_filter, **params)
+
+        results = await asyncio.gather(*(fetch(f) for f in filters))
+        return [item for items in results for item in items]
+
+    async def batch(self, requests: list[dict]) -> list[dict]:
+        """
+        Executa as requisições via /api/batch em blocos transacionais. Retorna
+        um resultado por requisição (`{"status": ..., "body": ...}`); se um
+        bloco falhar, todas as requisições dele recebem o erro.
+        """
+        chunk_size = settings.POCKETBASE_BATCH_SIZE
+        results: list[dict] = []
+        for start in range(0, len(requests), chunk_size):
+            chunk = requests[start : start + chunk_size]
+            response = await self.post("/api/batch", json={"requests": chunk})
+            if response.status_code == 200:
+                results.extend(response.json())
+                continue
+
+            try:
+                body = response.json()
+            except ValueError:
+                body = {"message": response.text}
+            failure = {"status": response.status_code, "body": body}
+            results.extend(failure for _ in chunk)
+        return results
+
+    async def realtime(self, topics: list[str]) -> AsyncIterator[tuple[str, dict]]:
+        """
+        Abre o stream SSE de realtime e assina os tópicos. O primeiro evento
+        é sempre PB_CONNECT, emitido já com a assinatura feita; os seguintes
+        são `(tópico, {"action": ..., "record": ...})`.
+        """
+        async with self.client.stream(
+            "GET",
+            "/api/realtime",
+            timeout=httpx.Timeout(None, connect=settings.POCKETBASE_CONNECT_TIMEOUT),
+        ) as response:
+            response.raise_for_status()
+
+            event, data = "message", []
+            async for line in response.aiter_lines():
+                if line.startswith(":"):
+                    continue
+                if line:
+                    field, _, value = line.partition(":")
+                    value = value[1:] if value.startswith(" ") else value
+                    if field == "event":
+                        event = value
+                    elif field == "data":
+                        data.append(value)
+                    continue
+
+                if data:
+                    payload = json.loads("\n".join(data))
+                    if event == "PB_CONNECT":
+                        subscription = await self.post(
+                            "/api/realtime",
+                            json={
+                                "clientId": payload["clientId"],
+                                "subscriptions": topics,
+                            },
+                        )
+                        subscription.raise_for_status()
+                    yield event, payload
+                event, data = "message", []
+
+
+pocketbase = PocketBaseClient()
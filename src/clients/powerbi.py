@@ -0,0 +1,26 @@
+import httpx
+from config import settings
+from .http import SharedAsyncClient
+
+POWERBI_API_URL = "https://api.powerbi.com/v1.0/myorg"
+
+
+class PowerBIClient(SharedAsyncClient):
+    """Cliente HTTP da API REST do Power BI compartilhado pelo processo."""
+
+    def _build(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=POWERBI_API_URL,
+            verify=settings.POWERBI_VERIFY_SSL,
+            limits=httpx.Limits(
+                max_connections=settings.POWERBI_POOL_SIZE,
+                max_keepalive_connections=settings.POWERBI_POOL_SIZE,
+            ),
+            timeout=httpx.Timeout(
+                settings.POWERBI_READ_TIMEOUT,
+                connect=settings.POWERBI_CONNECT_TIMEOUT,
+            ),
+        )
+
+
+powerbi = PowerBIClient()
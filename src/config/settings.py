@@ -7,16 +7,94 @@ load_dotenv()
 class Settings:
     # PocketBase
     POCKETBASE_URL: str = os.getenv("POCKETBASE_URL", "")
+    POCKETBASE_POOL_SIZE: int = int(os.getenv("POCKETBASE_POOL_SIZE", "20"))
+    POCKETBASE_CONNECT_TIMEOUT: float = float(os.getenv("POCKETBASE_CONNECT_TIMEOUT", "5"))
+    POCKETBASE_READ_TIMEOUT: float = float(os.getenv("POCKETBASE_READ_TIMEOUT", "30"))
+    POCKETBASE_VERIFY_SSL: bool = os.getenv("POCKETBASE_VERIFY_SSL", "false").lower() == "true"
+    # Tamanho de página e de filtros OR nas leituras em lote do PocketBase
+    POCKETBASE_PAGE_SIZE: int = int(os.getenv("POCKETBASE_PAGE_SIZE", "500"))
+    POCKETBASE_FILTER_CHUNK_SIZE: int = int(os.getenv("POCKETBASE_FILTER_CHUNK_SIZE", "50"))
+    # Blocos de filtro OR consultados ao mesmo tempo (abaixo do pool)
+    POCKETBASE_MAX_CONCURRENCY: int = int(os.getenv("POCKETBASE_MAX_CONCURRENCY", "8"))
+    # Maior perPage aceito pelo servidor (acima disso o PocketBase corta)
+    POCKETBASE_MAX_PER_PAGE: int = int(os.getenv("POCKETBASE_MAX_PER_PAGE", "500"))
+    # Requisições por chamada a /api/batch (limite padrão do PocketBase: 50)
+    POCKETBASE_BATCH_SIZE: int = int(os.getenv("POCKETBASE_BATCH_SIZE", "50"))
+    # Réplica em memória das coleções de acesso, mantida pelo realtime
+    ACCESS_REPLICA_ENABLED: bool = os.getenv("ACCESS_REPLICA_ENABLED", "true").lower() == "true"
+    ACCESS_REPLICA_RECONNECT_SECONDS: float = float(
+        os.getenv("ACCESS_REPLICA_RECONNECT_SECONDS", "5")
+    )
+    AUTH_TOKEN_CACHE_TTL: int = int(os.getenv("AUTH_TOKEN_CACHE_TTL", "60"))
+    AUTH_TOKEN_CACHE_SIZE: int = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "4096"))
+    AUTH_TOKEN_NEGATIVE_TTL: int = int(os.getenv("AUTH_TOKEN_NEGATIVE_TTL", "10"))
+    # Recusa de tokens após logout quando o token não declara expiração
+    AUTH_TOKEN_REVOCATION_TTL: int = int(
+        os.getenv("AUTH_TOKEN_REVOCATION_TTL", "1209600")
+    )
+    # Limite de ids na consulta de usuários em lote (GET /users?ids=...)
+    USER_BATCH_MAX_IDS: int = int(os.getenv("USER_BATCH_MAX_IDS", "500"))
+    # Dashboards visíveis por usuário; o TTL cobre alterações feitas fora da API
+    ENTITLEMENT_CACHE_TTL: int = int(os.getenv("ENTITLEMENT_CACHE_TTL", "600"))
+    ENTITLEMENT_CACHE_SIZE: int = int(os.getenv("ENTITLEMENT_CACHE_SIZE", "4096"))
 
     # Azure
     AZURE_TENANT_ID: str = os.getenv("AZURE_TENANT_ID", "")
     AZURE_CLIENT_ID: str = os.getenv("AZURE_CLIENT_ID", "")
     AZURE_CLIENT_SECRET: str = os.getenv("AZURE_CLIENT_SECRET", "")
 
+    # Power BI
+    POWERBI_POOL_SIZE: int = int(os.getenv("POWERBI_POOL_SIZE", "20"))
+    POWERBI_CONNECT_TIMEOUT: float = float(os.getenv("POWERBI_CONNECT_TIMEOUT", "5"))
+    POWERBI_READ_TIMEOUT: float = float(os.getenv("POWERBI_READ_TIMEOUT", "60"))
+    POWERBI_VERIFY_SSL: bool = os.getenv("POWERBI_VERIFY_SSL", "false").lower() == "true"
+    POWERBI_TOKEN_REFRESH_MARGIN: int = int(os.getenv("POWERBI_TOKEN_REFRESH_MARGIN", "300"))
+    POWERBI_CATALOG_TTL: int = int(os.getenv("POWERBI_CATALOG_TTL", "300"))
+    # Intervalo entre cargas completas; entre elas a sincronização é incremental
+    POWERBI_CATALOG_FULL_SYNC_SECONDS: int = int(
+        os.getenv("POWERBI_CATALOG_FULL_SYNC_SECONDS", "86400")
+    )
+    # Carrega o catálogo pela API admin (requer permissão de admin do tenant)
+    POWERBI_USE_ADMIN_API: bool = os.getenv("POWERBI_USE_ADMIN_API", "false").lower() == "true"
+    POWERBI_ADMIN_PAGE_SIZE: int = int(os.getenv("POWERBI_ADMIN_PAGE_SIZE", "5000"))
+    POWERBI_ADMIN_RETRY_SECONDS: int = int(os.getenv("POWERBI_ADMIN_RETRY_SECONDS", "3600"))
+    POWERBI_MAX_CONCURRENCY: int = int(os.getenv("POWERBI_MAX_CONCURRENCY", "8"))
+    POWERBI_TOKEN_RETRY_SECONDS: int = int(os.getenv("POWERBI_TOKEN_RETRY_SECONDS", "30"))
+
     # Airflow
     AIRFLOW_URL: str = os.getenv("AIRFLOW_URL", "")
     AIRFLOW_USERNAME: str = os.getenv("AIRFLOW_USERNAME", "")
     AIRFLOW_PASSWORD: str = os.getenv("AIRFLOW_PASSWORD", "")
+    AIRFLOW_POOL_SIZE: int = int(os.getenv("AIRFLOW_POOL_SIZE", "10"))
+    AIRFLOW_CONNECT_TIMEOUT: float = float(os.getenv("AIRFLOW_CONNECT_TIMEOUT", "5"))
+    AIRFLOW_READ_TIMEOUT: float = float(os.getenv("AIRFLOW_READ_TIMEOUT", "30"))
+    AIRFLOW_VERIFY_SSL: bool = os.getenv("AIRFLOW_VERIFY_SSL", "false").lower() == "true"
+    # Espera antes de renegociar a autenticação quando nenhuma foi aceita
+    AIRFLOW_AUTH_RETRY_SECONDS: int = int(os.getenv("AIRFLOW_AUTH_RETRY_SECONDS", "30"))
+    AIRFLOW_PAGE_SIZE: int = int(os.getenv("AIRFLOW_PAGE_SIZE", "100"))
+    AIRFLOW_MAX_CONCURRENCY: int = int(os.getenv("AIRFLOW_MAX_CONCURRENCY", "8"))
+    # Lista de DAGs: atualizada em background após o TTL, descartada após o máximo
+    AIRFLOW_DAG_CACHE_TTL: int = int(os.getenv("AIRFLOW_DAG_CACHE_TTL", "60"))
+    AIRFLOW_DAG_CACHE_MAX_AGE: int = int(os.getenv("AIRFLOW_DAG_CACHE_MAX_AGE", "900"))
+    # Refresh: cache curto das execuções ativas e janela em que um novo
+    # pedido reaproveita a execução disparada (0 desativa)
+    AIRFLOW_ACTIVE_RUN_CACHE_TTL: int = int(
+        os.getenv("AIRFLOW_ACTIVE_RUN_CACHE_TTL", "5")
+    )
+    AIRFLOW_REFRESH_DEBOUNCE_SECONDS: int = int(
+        os.getenv("AIRFLOW_REFRESH_DEBOUNCE_SECONDS", "30")
+    )
+    # Intervalo de consulta de uma execução acompanhada por SSE
+    AIRFLOW_RUN_POLL_SECONDS: float = float(os.getenv("AIRFLOW_RUN_POLL_SECONDS", "5"))
+    SSE_KEEPALIVE_SECONDS: float = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+    # Fila de refresh: os endpoints respondem 202 com o id do job
+    REFRESH_QUEUE_ENABLED: bool = os.getenv("REFRESH_QUEUE_ENABLED", "false").lower() == "true"
+    REFRESH_QUEUE_WORKERS: int = int(os.getenv("REFRESH_QUEUE_WORKERS", "4"))
+    REFRESH_QUEUE_SIZE: int = int(os.getenv("REFRESH_QUEUE_SIZE", "1000"))
+    REFRESH_JOB_MAX_JOBS: int = int(os.getenv("REFRESH_JOB_MAX_JOBS", "10000"))
+    REFRESH_JOB_RETENTION_SECONDS: int = int(
+        os.getenv("REFRESH_JOB_RETENTION_SECONDS", "3600")
+    )
 
     # API
     API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
@@ -3,6 +3,7 @@ from .user_controller import router as user_router
 from .group_controller import router as group_router
 from .powerbi_controller import router as powerbi_router
 from .pipeline_controller import router as pipeline_router
+from .export_controller import router as export_router
 
 __all__ = [
     "auth_router",
@@ -10,4 +11,5 @@ __all__ = [
     "group_router",
     "powerbi_router",
     "pipeline_router",
+    "export_router",
 ]
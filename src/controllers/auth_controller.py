@@ -1,26 +1,37 @@
 from fastapi import APIRouter, Depends
+from fastapi.security import HTTPAuthorizationCredentials
 from models.user import IUserAuthLogin, IUserAuthRegister
 from services.auth_service import AuthService
-from middlewares.auth import verify_token
+from middlewares.auth import security, verify_token
 
 router = APIRouter(prefix="/user", tags=["Authentication"])
 
 
 @router.post("/auth")
-def auth(user: IUserAuthLogin):
+async def auth(user: IUserAuthLogin):
     """Autentica o usuário com email e senha."""
-    return AuthService.login(user.email, user.password)
+    return await AuthService.login(user.email, user.password)
 
 
 @router.post("/register")
-def register(user: IUserAuthRegister):
+async def register(user: IUserAuthRegister):
     """Registra um novo usuário."""
-    return AuthService.register(
+    return await AuthService.register(
         user.username, user.email, user.password, user.confirm_password, user.role
     )
 
 
 @router.post("/logout")
-def logout(current_user: dict = Depends(verify_token)):
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict = Depends(verify_token),
+):
     """Logout do usuário (gerenciado no cliente)."""
+    AuthService.revoke_token(credentials.credentials)
     return {"message": "Logged out"}
+
+
+@router.get("/auth/cache")
+async def auth_cache_stats(current_user: dict = Depends(verify_token)):
+    """Retorna os contadores dos caches de autenticação."""
+    return AuthService.cache_stats()
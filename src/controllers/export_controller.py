@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from services.export_service import ExportService
+from middlewares.auth import verify_token
+
+router = APIRouter(prefix="/app/export", tags=["Export"])
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+@router.get("/users")
+async def export_users(current_user: dict = Depends(verify_token)):
+    """Exporta todos os usuários em NDJSON (uma linha por usuário)."""
+    return StreamingResponse(
+        ExportService.export_users(), media_type=NDJSON_MEDIA_TYPE
+    )
+
+
+@router.get("/groups")
+async def export_groups(current_user: dict = Depends(verify_token)):
+    """Exporta todos os grupos em NDJSON (uma linha por grupo)."""
+    return StreamingResponse(
+        ExportService.export_groups(), media_type=NDJSON_MEDIA_TYPE
+    )
+
+
+@router.get("/memberships")
+async def export_memberships(current_user: dict = Depends(verify_token)):
+    """Exporta os vínculos usuário-grupo em NDJSON (uma linha por vínculo)."""
+    return StreamingResponse(
+        ExportService.export_memberships(), media_type=NDJSON_MEDIA_TYPE
+    )
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Depends
-from models.group import IGroupUpdate
+from fastapi import APIRouter, Depends, Query
+from models.group import IGroupDashboardsBulk, IGroupUpdate, IGroupUsersBulk
 from services.group_service import GroupService
 from services.user_service import UserService
 from services.powerbi_service import PowerBIService
@@ -9,105 +9,154 @@ router = APIRouter(prefix="/app", tags=["Groups"])
 
 
 @router.get("/groups/{group_id}")
-def read_hopper_group(group_id: str, current_user: dict = Depends(verify_token)):
+async def read_hopper_group(group_id: str, current_user: dict = Depends(verify_token)):
     """Retorna os dados de um grupo específico."""
-    return GroupService.get_group(group_id)
+    return await GroupService.get_group(group_id)
 
 
 @router.get("/groups")
-def read_hopper_groups(current_user: dict = Depends(verify_token)):
+async def read_hopper_groups(current_user: dict = Depends(verify_token)):
     """Retorna lista de grupos."""
-    return GroupService.get_groups()
+    return await GroupService.get_groups()
 
 
 @router.post("/groups")
-def create_hopper_group(
+async def create_hopper_group(
     name: str,
     description: str,
     active: bool = True,
     current_user: dict = Depends(verify_token),
 ):
     """Cria um novo grupo."""
-    return GroupService.create_group(name, description, active)
+    return await GroupService.create_group(name, description, active)
 
 
 @router.patch("/groups/{group_id}")
-def update_hopper_group(
+async def update_hopper_group(
     group_id: str,
     group_data: IGroupUpdate,
     current_user: dict = Depends(verify_token),
 ):
     """Atualiza os dados de um grupo."""
     update_data = group_data.model_dump(exclude_none=True)
-    return GroupService.update_group(group_id, update_data)
+    return await GroupService.update_group(group_id, update_data)
 
 
 @router.put("/groups/{group_id}")
-def update_hopper_group_put(
+async def update_hopper_group_put(
     group_id: str,
     group_data: IGroupUpdate,
     current_user: dict = Depends(verify_token),
 ):
     """Atualiza os dados de um grupo (PUT)."""
     update_data = group_data.model_dump(exclude_none=True)
-    return GroupService.update_group(group_id, update_data)
+    return await GroupService.update_group(group_id, update_data)
 
 
 @router.delete("/groups/{group_id}")
-def delete_hopper_group(group_id: str, current_user: dict = Depends(verify_token)):
+async def delete_hopper_group(
+    group_id: str, current_user: dict = Depends(verify_token)
+):
     """Deleta um grupo."""
-    return GroupService.delete_group(group_id)
+    return await GroupService.delete_group(group_id)
 
 
 @router.get("/groups/{group_id}/users")
-def read_hopper_group_users(group_id: str, current_user: dict = Depends(verify_token)):
-    """Retorna lista de usuários de um grupo."""
-    return GroupService.get_group_users(group_id)
+async def read_hopper_group_users(
+    group_id: str,
+    page: int = Query(1, ge=1),
+    perPage: int = Query(30, ge=1, le=500),
+    current_user: dict = Depends(verify_token),
+):
+    """Retorna uma página da lista de usuários de um grupo."""
+    return await GroupService.get_group_users(group_id, page, perPage)
 
 
 @router.get("/users/{user_id}/groups")
-def read_user_groups(user_id: str, current_user: dict = Depends(verify_token)):
+async def read_user_groups(user_id: str, current_user: dict = Depends(verify_token)):
     """Retorna todos os grupos em que o usuário pertence."""
-    return UserService.get_user_groups(user_id)
+    return await UserService.get_user_groups(user_id)
 
 
 @router.get("/groups/{group_id}/dashboards")
-def read_hopper_group_dashboards(
+async def read_hopper_group_dashboards(
     group_id: str, current_user: dict = Depends(verify_token)
 ):
     """Retorna lista de dashboards de um grupo."""
-    all_dashboards_response = PowerBIService.get_dashboards()
-    all_dashboards_list = all_dashboards_response.get("dashboards", [])
-    return GroupService.get_group_dashboards(group_id, all_dashboards_list)
+    catalog = await PowerBIService.get_catalog()
+    return await GroupService.get_group_dashboards(group_id, catalog.by_id)
+
+
+# As rotas em lote vêm antes das rotas com {user_id}/{dashboard_id}
+@router.post("/groups/{group_id}/users/bulk-add")
+async def add_users_to_group(
+    group_id: str,
+    payload: IGroupUsersBulk,
+    current_user: dict = Depends(verify_token),
+):
+    """Adiciona vários usuários a um grupo, com resultado por usuário."""
+    return await GroupService.add_users_to_group(group_id, payload.user_ids)
+
+
+@router.post("/groups/{group_id}/users/bulk-remove")
+async def remove_users_from_group(
+    group_id: str,
+    payload: IGroupUsersBulk,
+    current_user: dict = Depends(verify_token),
+):
+    """Remove vários usuários de um grupo, com resultado por usuário."""
+    return await GroupService.remove_users_from_group(group_id, payload.user_ids)
+
+
+@router.post("/groups/{group_id}/dashboards/bulk-add")
+async def add_dashboards_to_group(
+    group_id: str,
+    payload: IGroupDashboardsBulk,
+    current_user: dict = Depends(verify_token),
+):
+    """Vincula vários dashboards a um grupo, com resultado por dashboard."""
+    return await GroupService.add_dashboards_to_group(group_id, payload.dashboard_ids)
+
+
+@router.post("/groups/{group_id}/dashboards/bulk-remove")
+async def remove_dashboards_from_group(
+    group_id: str,
+    payload: IGroupDashboardsBulk,
+    current_user: dict = Depends(verify_token),
+):
+    """Desvincula vários dashboards de um grupo, com resultado por dashboard."""
+    return await GroupService.remove_dashboards_from_group(
+        group_id, payload.dashboard_ids
+    )
 
 
 @router.post("/groups/{group_id}/users/{user_id}")
-def add_user_to_group(
+async def add_user_to_group(
     group_id: str, user_id: str, current_user: dict = Depends(verify_token)
 ):
     """Adiciona um usuário a um grupo."""
-    return GroupService.add_user_to_group(group_id, user_id)
+    return await GroupService.add_user_to_group(group_id, user_id)
 
 
 @router.delete("/groups/{group_id}/users/{user_id}")
-def remove_user_from_group(
+async def remove_user_from_group(
     group_id: str, user_id: str, current_user: dict = Depends(verify_token)
 ):
     """Remove um usuário de um grupo."""
-    return GroupService.remove_user_from_group(group_id, user_id)
+    return await GroupService.remove_user_from_group(group_id, user_id)
 
 
 @router.post("/groups/{group_id}/dashboards/{dashboard_id}")
-def add_dashboard_to_group(
+async def add_dashboard_to_group(
     group_id: str, dashboard_id: str, current_user: dict = Depends(verify_token)
 ):
     """Adiciona um dashboard a um grupo."""
-    return GroupService.add_dashboard_to_group(group_id, dashboard_id)
+    return await GroupService.add_dashboard_to_group(group_id, dashboard_id)
 
 
 @router.delete("/groups/{group_id}/dashboards/{dashboard_id}")
-def remove_dashboard_from_group(
+async def remove_dashboard_from_group(
     group_id: str, dashboard_id: str, current_user: dict = Depends(verify_token)
 ):
     """Remove um dashboard de um grupo."""
-    return GroupService.remove_dashboard_from_group(group_id, dashboard_id)
+    return await GroupService.remove_dashboard_from_group(group_id, dashboard_id)
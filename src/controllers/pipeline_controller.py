@@ -1,71 +1,88 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from config import settings
 from services.airflow_service import AirflowService
+from services.pipeline_events import run_watcher
+from services.refresh_jobs import refresh_jobs
 from middlewares.auth import verify_token
 
 router = APIRouter(tags=["Pipelines"])
 
 
 @router.get("/pipelines/test-connection")
-def test_airflow_connection(current_user: dict = Depends(verify_token)):
+async def test_airflow_connection(current_user: dict = Depends(verify_token)):
     """Testa a conexão com o Airflow."""
-    return AirflowService.test_connection()
+    return await AirflowService.test_connection()
 
 
 @router.get("/pipelines")
-def get_pipelines(current_user: dict = Depends(verify_token)):
+async def get_pipelines(
+    dag_id_pattern: str | None = None,
+    only_active: bool | None = None,
+    tags: list[str] | None = Query(None),
+    current_user: dict = Depends(verify_token),
+):
     """Retorna lista de pipelines (DAGs) do Airflow."""
-    return AirflowService.get_pipelines()
+    return await AirflowService.get_pipelines(dag_id_pattern, only_active, tags)
 
 
 @router.get("/app/dashboards/pipelines")
-def get_all_pipeline_associations(current_user: dict = Depends(verify_token)):
+async def get_all_pipeline_associations(current_user: dict = Depends(verify_token)):
     """Retorna todas as associações entre pipelines e dashboards."""
-    return AirflowService.get_all_pipeline_associations()
+    return await AirflowService.get_all_pipeline_associations()
 
 
 @router.get("/app/dashboards/{dashboard_id}/pipeline")
-def get_dashboard_pipeline_association(
+async def get_dashboard_pipeline_association(
     dashboard_id: str, current_user: dict = Depends(verify_token)
 ):
     """Retorna a associação de pipeline para um dashboard específico."""
-    result = AirflowService.get_dashboard_pipeline_association(dashboard_id)
+    result = await AirflowService.get_dashboard_pipeline_association(dashboard_id)
     if result is None:
         return {"pipeline_id": None, "dashboard_id": dashboard_id}
     return result
 
 
 @router.get("/app/dashboards/{pipeline_id}/pipeline")
-def get_pipeline_association(
+async def get_pipeline_association(
     pipeline_id: str, current_user: dict = Depends(verify_token)
 ):
     """Retorna a associação de dashboard para uma pipeline específica."""
-    return AirflowService.get_pipeline_association(pipeline_id)
+    return await AirflowService.get_pipeline_association(pipeline_id)
 
 
 @router.post("/app/pipelines/{pipeline_id}/dashboard/{dashboard_id}")
-def create_pipeline_association(
+async def create_pipeline_association(
     pipeline_id: str, dashboard_id: str, current_user: dict = Depends(verify_token)
 ):
     """Cria uma associação entre pipeline e dashboard."""
-    return AirflowService.create_pipeline_association(dashboard_id, pipeline_id)
+    return await AirflowService.create_pipeline_association(dashboard_id, pipeline_id)
 
 
 @router.delete("/app/dashboards/{dashboard_id}/pipeline")
-def delete_pipeline_association(
+async def delete_pipeline_association(
     dashboard_id: str, current_user: dict = Depends(verify_token)
 ):
     """Deleta a associação de pipeline para um dashboard."""
-    return AirflowService.delete_pipeline_association(dashboard_id)
+    return await AirflowService.delete_pipeline_association(dashboard_id)
 
 
 @router.post("/app/dashboards/{dashboard_id}/pipeline/refresh")
-def refresh_dashboard_pipeline(
+async def refresh_dashboard_pipeline(
     dashboard_id: str, current_user: dict = Depends(verify_token)
 ):
-    """Executa (refresh) a pipeline associada a um dashboard específico."""
+    """
+    Executa (refresh) a pipeline associada a um dashboard específico. Com a
+    fila de refresh ativa, responde 202 com o job a consultar em /app/jobs.
+    """
+    if settings.REFRESH_QUEUE_ENABLED:
+        return _accepted(refresh_jobs.submit(dashboard_id=dashboard_id))
+
     try:
         # Primeiro busca a associação para obter o pipeline_id
-        association = AirflowService.get_dashboard_pipeline_association(dashboard_id)
+        association = await AirflowService.get_dashboard_pipeline_association(
+            dashboard_id
+        )
         
         if not association or "pipeline_id" not in association:
             return {
@@ -74,16 +91,67 @@ def refresh_dashboard_pipeline(
             }
         
         pipeline_id = association["pipeline_id"]
-        return AirflowService.refresh_pipeline(pipeline_id)
+        return await AirflowService.refresh_pipeline(pipeline_id)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/app/dashboards/{dashboard_id}/pipeline/events")
+async def stream_dashboard_pipeline_events(
+    dashboard_id: str,
+    dag_run_id: str | None = None,
+    current_user: dict = Depends(verify_token),
+):
+    """
+    Transmite por SSE as mudanças de estado de uma execução da pipeline do
+    dashboard (por padrão a mais recente) até o estado terminal.
+    """
+    association = await AirflowService.get_dashboard_pipeline_association(
+        dashboard_id
+    )
+    if not association or "pipeline_id" not in association:
+        raise HTTPException(
+            status_code=404, detail="No pipeline associated with this dashboard"
+        )
+
+    pipeline_id = association["pipeline_id"]
+    if dag_run_id is None:
+        run = await AirflowService.get_latest_run(pipeline_id)
+        if run is None:
+            raise HTTPException(status_code=404, detail="No DAG runs found")
+        dag_run_id = run["dag_run_id"]
+
+    return StreamingResponse(
+        run_watcher.events(pipeline_id, dag_run_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/app/pipeline/{pipeline_id}/refresh")
-def refresh_pipeline_association(
+async def refresh_pipeline_association(
     pipeline_id: str, current_user: dict = Depends(verify_token)
 ):
     """Executa (refresh) uma pipeline específica."""
-    return AirflowService.refresh_pipeline(pipeline_id)
+    if settings.REFRESH_QUEUE_ENABLED:
+        return _accepted(refresh_jobs.submit(pipeline_id=pipeline_id))
+    return await AirflowService.refresh_pipeline(pipeline_id)
+
+
+@router.get("/app/jobs/{job_id}")
+async def read_refresh_job(job_id: str, current_user: dict = Depends(verify_token)):
+    """Retorna o status de um job de refresh."""
+    job = refresh_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+def _accepted(job: dict) -> JSONResponse:
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job["id"], "status": job["status"]},
+        headers={"Location": f"/app/jobs/{job['id']}"},
+    )
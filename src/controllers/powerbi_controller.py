@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends
 from services.powerbi_service import PowerBIService
-from services.user_service import UserService
 from services.group_service import GroupService
 from middlewares.auth import verify_token
 
@@ -8,67 +7,63 @@ router = APIRouter(tags=["Power BI"])
 
 
 @router.get("/dashboards")
-def read_dashboards(current_user: dict = Depends(verify_token)):
+async def read_dashboards(current_user: dict = Depends(verify_token)):
     """Retorna lista de dashboards do Power BI filtrados pelos grupos do usuário."""
     user_id = current_user.get("record", {}).get("id")
     
     if not user_id:
         return {"dashboards": []}
     
-    # Busca todos os grupos do usuário
-    user_groups_response = UserService.get_user_groups(user_id)
-    user_groups = user_groups_response.get("groups", [])
+    # Ids dos dashboards liberados ao usuário (cache invalidado nas escritas)
+    dashboard_ids = await GroupService.get_user_dashboard_ids(user_id)
     
-    if not user_groups:
+    if not dashboard_ids:
         return {"dashboards": []}
     
-    # Busca todos os dashboards do Power BI
-    all_dashboards_response = PowerBIService.get_dashboards()
-    all_dashboards = all_dashboards_response.get("dashboards", [])
-    
-    # Coleta todos os dashboard_ids dos grupos do usuário
-    dashboard_ids = set()
-    for group in user_groups:
-        group_id = group.get("id")
-        group_dashboards = GroupService.get_group_dashboards(group_id, all_dashboards)
-        for dashboard in group_dashboards:
-            dashboard_ids.add(dashboard.get("id"))
+    catalog = await PowerBIService.get_catalog()
     
     # Filtra apenas os dashboards que pertencem aos grupos do usuário
     filtered_dashboards = [
-        dashboard for dashboard in all_dashboards 
+        dashboard for dashboard in catalog.dashboards 
         if dashboard.get("id") in dashboard_ids
     ]
     
     return {"dashboards": filtered_dashboards}
 
 
+@router.post("/dashboards/catalog/invalidate")
+async def invalidate_dashboards_catalog(current_user: dict = Depends(verify_token)):
+    """Invalida o catálogo de dashboards em memória e agenda uma nova carga."""
+    PowerBIService.invalidate_catalog()
+    return {"message": "Catalog invalidated"}
+
+
 @router.get("/groups")
-def read_groups(current_user: dict = Depends(verify_token)):
+async def read_groups(current_user: dict = Depends(verify_token)):
     """Retorna a lista de grupos do Power BI."""
-    return PowerBIService.get_groups()
+    return await PowerBIService.get_groups()
 
 
 @router.get("/groups/{group_id}/reports")
-def read_reports(group_id: str, current_user: dict = Depends(verify_token)):
+async def read_reports(group_id: str, current_user: dict = Depends(verify_token)):
     """Retorna a lista de relatórios em um grupo específico do Power BI."""
-    return PowerBIService.get_reports(group_id)
+    return await PowerBIService.get_reports(group_id)
 
 
 @router.get("/groups/{group_id}/report/{report_id}")
-def read_report(
+async def read_report(
     group_id: str, report_id: str, current_user: dict = Depends(verify_token)
 ):
     """Retorna um relatório específico de um grupo do Power BI."""
-    return PowerBIService.get_report(group_id, report_id)
+    return await PowerBIService.get_report(group_id, report_id)
 
 
 @router.delete("/groups/{group_id}/report/{report_id}/dataset/{dataset_id}")
-def delete_report(
+async def delete_report(
     group_id: str,
     report_id: str,
     dataset_id: str,
     current_user: dict = Depends(verify_token),
 ):
     """Deleta um relatório específico de um grupo do Power BI."""
-    return PowerBIService.delete_report(group_id, report_id, dataset_id)
+    return await PowerBIService.delete_report(group_id, report_id, dataset_id)
@@ -7,21 +7,36 @@ router = APIRouter(prefix="/user", tags=["Users"])
 
 
 @router.get("/{user_id}")
-def read_user(user_id: str, current_user: dict = Depends(verify_token)):
+async def read_user(user_id: str, current_user: dict = Depends(verify_token)):
     """Retorna os dados de um usuário específico."""
-    return UserService.get_user(user_id)
+    return await UserService.get_user(user_id)
 
 
 @router.get("s")
-def read_users(
-    page: int = 1, perPage: int = 30, current_user: dict = Depends(verify_token)
+async def read_users(
+    page: int = 1,
+    perPage: int = 30,
+    ids: str | None = None,
+    cursor: str | None = None,
+    includeTotal: bool = False,
+    current_user: dict = Depends(verify_token),
 ):
-    """Retorna lista paginada de usuários."""
-    return UserService.get_users(page, perPage)
+    """
+    Retorna lista paginada de usuários, ou, com `ids=a,b,c`, os usuários
+    informados indexados por id.
+
+    Com `cursor` (vazio na primeira página) a paginação é por cursor: cada
+    resposta traz `next_cursor` e o total só é contado com `includeTotal`.
+    """
+    if ids is not None:
+        return await UserService.get_users_by_ids(ids.split(","))
+    if cursor is not None:
+        return await UserService.get_users_after(cursor, perPage, includeTotal)
+    return await UserService.get_users(page, perPage)
 
 
 @router.post("")
-def create_user(
+async def create_user(
     username: str,
     email: str,
     password: str,
@@ -30,21 +45,23 @@ def create_user(
     current_user: dict = Depends(verify_token),
 ):
     """Cria um novo usuário."""
-    return UserService.create_user(username, email, password, passwordConfirm, role)
+    return await UserService.create_user(
+        username, email, password, passwordConfirm, role
+    )
 
 
 @router.patch("/{user_id}")
-def update_user(
+async def update_user(
     user_id: str,
     user_data: IUserUpdate,
     current_user: dict = Depends(verify_token),
 ):
     """Atualiza os dados de um usuário."""
     update_data = user_data.model_dump(exclude_none=True)
-    return UserService.update_user(user_id, update_data)
+    return await UserService.update_user(user_id, update_data)
 
 
 @router.delete("/{user_id}")
-def delete_user(user_id: str, current_user: dict = Depends(verify_token)):
+async def delete_user(user_id: str, current_user: dict = Depends(verify_token)):
     """Deleta um usuário."""
-    return UserService.delete_user(user_id)
+    return await UserService.delete_user(user_id)
@@ -1,10 +1,41 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
+from clients.airflow import airflow
+from clients.pocketbase import pocketbase
+from clients.powerbi import powerbi
 from config import settings
 from routes import setup_routes
+from services.access_replica import access_replica
+from services.powerbi_service import PowerBIService
+from services.refresh_jobs import refresh_jobs
 
-app = FastAPI(title="Hopper API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background_tasks = []
+    if settings.AZURE_CLIENT_ID:
+        background_tasks.append(asyncio.create_task(PowerBIService.keep_token_fresh()))
+    if settings.ACCESS_REPLICA_ENABLED and settings.POCKETBASE_URL:
+        background_tasks.append(asyncio.create_task(access_replica.run()))
+    if settings.AIRFLOW_URL:
+        background_tasks.append(asyncio.create_task(airflow.prepare()))
+    if settings.REFRESH_QUEUE_ENABLED:
+        background_tasks.extend(refresh_jobs.start())
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    # Fecha os pools de conexões compartilhados no shutdown
+    await pocketbase.aclose()
+    await powerbi.aclose()
+    await airflow.aclose()
+
+
+app = FastAPI(title="Hopper API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,7 +54,7 @@ setup_routes(app)
 
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"Hello": "World"}
 
 
@@ -5,10 +5,10 @@ from services.auth_service import AuthService
 security = HTTPBearer()
 
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """
     Verifica o token de autenticação do usuário no PocketBase.
     Retorna os dados do usuário autenticado.
     """
     token = credentials.credentials
-    return AuthService.verify_token(token)
+    return await AuthService.verify_token(token)
@@ -1,9 +1,11 @@
 from .user import IUserAuthLogin, IUserAuthRegister, IUserUpdate
-from .group import IGroupUpdate
+from .group import IGroupDashboardsBulk, IGroupUpdate, IGroupUsersBulk
 
 __all__ = [
     "IUserAuthLogin",
     "IUserAuthRegister",
     "IUserUpdate",
     "IGroupUpdate",
+    "IGroupUsersBulk",
+    "IGroupDashboardsBulk",
 ]
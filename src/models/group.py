@@ -5,3 +5,11 @@ class IGroupUpdate(BaseModel):
     name: str | None = None
     description: str | None = None
     active: bool | None = None
+
+
+class IGroupUsersBulk(BaseModel):
+    user_ids: list[str]
+
+
+class IGroupDashboardsBulk(BaseModel):
+    dashboard_ids: list[str]
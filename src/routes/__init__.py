@@ -5,6 +5,7 @@ from controllers import (
     group_router,
     powerbi_router,
     pipeline_router,
+    export_router,
 )
 
 
@@ -18,6 +19,7 @@ def setup_routes(app):
     api_router.include_router(group_router)
     api_router.include_router(powerbi_router)
     api_router.include_router(pipeline_router)
+    api_router.include_router(export_router)
 
     # Adiciona o router principal à aplicação
     app.include_router(api_router)
@@ -3,6 +3,7 @@ from .user_service import UserService
 from .group_service import GroupService
 from .powerbi_service import PowerBIService
 from .airflow_service import AirflowService
+from .export_service import ExportService
 
 __all__ = [
     "AuthService",
@@ -10,4 +11,5 @@ __all__ = [
     "GroupService",
     "PowerBIService",
     "AirflowService",
+    "ExportService",
 ]
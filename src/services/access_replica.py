@@ -0,0 +1,167 @@
+import asyncio
+import logging
+from collections.abc import Callable
+from clients.pocketbase import pocketbase
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+Listener = Callable[[str | None, dict | None, dict | None], None]
+
+# Coleções replicadas e os campos indexados de cada uma
+REPLICATED_COLLECTIONS = {
+    "groups": (),
+    "groups_users": ("user_id", "group_id"),
+    "groups_dashboards": ("group_id", "dashboard_id"),
+    "pipelines_dashboards": ("dashboard_id", "pipeline_id"),
+}
+
+
+class _Index:
+    """Registros de uma coleção agrupados pelo valor de um campo."""
+
+    def __init__(self, field: str):
+        self.field = field
+        self.buckets: dict[str, dict[str, dict]] = {}
+
+    def add(self, record: dict) -> None:
+        self.buckets.setdefault(record.get(self.field), {})[record["id"]] = record
+
+    def remove(self, record: dict) -> None:
+        key = record.get(self.field)
+        bucket = self.buckets.get(key)
+        if bucket is not None:
+            bucket.pop(record["id"], None)
+            if not bucket:
+                del self.buckets[key]
+
+    def get(self, key: str) -> list[dict]:
+        return list(self.buckets.get(key, {}).values())
+
+
+class _Collection:
+    """Registros de uma coleção por id, com os índices configurados."""
+
+    def __init__(self, fields: tuple[str, ...]):
+        self.records: dict[str, dict] = {}
+        self.indexes = {field: _Index(field) for field in fields}
+
+    def put(self, record: dict) -> dict | None:
+        old = self.delete(record["id"])
+        self.records[record["id"]] = record
+        for index in self.indexes.values():
+            index.add(record)
+        return old
+
+    def delete(self, record_id: str) -> dict | None:
+        old = self.records.pop(record_id, None)
+        if old is not None:
+            for index in self.indexes.values():
+                index.remove(old)
+        return old
+
+    def find(self, field: str, value: str) -> list[dict]:
+        return self.indexes[field].get(value)
+
+
+class AccessReplica:
+    """
+    Réplica em memória das coleções de controle de acesso do PocketBase.
+
+    A carga inicial lê as coleções inteiras; depois disso a réplica segue o
+    stream de realtime. Se o stream cair, `ready` volta a False (as leituras
+    devem voltar a consultar o PocketBase) até a reconexão e nova carga.
+
+    Listeners recebem `(coleção, registro anterior, registro novo)` a cada
+    alteração, e `(None, None, None)` após uma carga completa.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._collections = self._empty()
+        self._listeners: list[Listener] = []
+
+    @staticmethod
+    def _empty() -> dict[str, _Collection]:
+        return {
+            name: _Collection(fields) for name, fields in REPLICATED_COLLECTIONS.items()
+        }
+
+    def add_listener(self, listener: Listener) -> None:
+        self._listeners.append(listener)
+
+    def _notify(self, collection: str | None, old: dict | None, new: dict | None):
+        for listener in self._listeners:
+            try:
+                listener(collection, old, new)
+            except Exception:
+                logger.exception("Falha ao notificar alteração na réplica de acesso")
+
+    async def resync(self) -> None:
+        """Recarrega todas as coleções replicadas do PocketBase."""
+        names = list(REPLICATED_COLLECTIONS)
+        results = await asyncio.gather(*(pocketbase.list_all(name) for name in names))
+
+        collections = self._empty()
+        for name, records in zip(names, results):
+            for record in records:
+                collections[name].put(record)
+
+        self._collections = collections
+        self.ready = True
+        self._notify(None, None, None)
+
+    def apply(self, collection: str, action: str, record: dict) -> None:
+        """Aplica um evento de realtime (ou o resultado de uma escrita local)."""
+        replica = self._collections.get(collection)
+        if replica is None or not isinstance(record, dict) or not record.get("id"):
+            return
+
+        if action == "delete":
+            old, new = replica.delete(record["id"]), None
+        else:
+            old, new = replica.put(record), record
+        self._notify(collection, old, new)
+
+    async def run(self) -> None:
+        """Mantém a réplica atualizada, reconectando ao realtime quando cair."""
+        topics = [f"{name}/*" for name in REPLICATED_COLLECTIONS]
+        while True:
+            try:
+                async for event, data in pocketbase.realtime(topics):
+                    if event == "PB_CONNECT":
+                        # Já assinado: eventos da carga ficam na fila do stream
+                        await self.resync()
+                    else:
+                        self.apply(
+                            event.split("/")[0],
+                            data.get("action"),
+                            data.get("record") or {},
+                        )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Stream de realtime do PocketBase interrompido")
+
+            self.ready = False
+            await asyncio.sleep(settings.ACCESS_REPLICA_RECONNECT_SECONDS)
+
+    def groups(self) -> dict[str, dict]:
+        return self._collections["groups"].records
+
+    def user_memberships(self, user_id: str) -> list[dict]:
+        return self._collections["groups_users"].find("user_id", user_id)
+
+    def group_memberships(self, group_id: str) -> list[dict]:
+        return self._collections["groups_users"].find("group_id", group_id)
+
+    def group_dashboards(self, group_id: str) -> list[dict]:
+        return self._collections["groups_dashboards"].find("group_id", group_id)
+
+    def dashboard_pipelines(self, dashboard_id: str) -> list[dict]:
+        return self._collections["pipelines_dashboards"].find(
+            "dashboard_id", dashboard_id
+        )
+
+
+access_replica = AccessReplica()
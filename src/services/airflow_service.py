@@ -1,40 +1,86 @@
-import requests
-import base64
+import asyncio
+import logging
+import time
+import uuid
+import httpx
+from collections.abc import Awaitable, Callable, Hashable
 from datetime import datetime, timezone
 from fastapi import HTTPException
-from requests.auth import HTTPBasicAuth
+from clients.airflow import airflow
+from clients.pocketbase import pocketbase, quote
 from config import settings
+from services.access_replica import access_replica
+from utils.cache import TTLCache
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class _DagListingCache:
+    """
+    Listagens de DAGs por combinação de filtros. Depois do TTL a listagem em
+    cache continua sendo servida enquanto uma atualização roda em background;
+    respostas com erro não são guardadas.
+    """
+
+    def __init__(self):
+        self._entries = TTLCache(maxsize=64, ttl=settings.AIRFLOW_DAG_CACHE_MAX_AGE)
+        self._refreshing: dict[Hashable, asyncio.Task] = {}
+        self._inflight = SingleFlight()
+
+    async def get(
+        self, key: Hashable, loader: Callable[..., Awaitable[dict]], *args
+    ) -> dict:
+        entry = self._entries.get(key)
+        if entry is None:
+            return await self._inflight.do_async(key, self._load, key, loader, *args)
+
+        loaded_at, result = entry
+        if time.monotonic() - loaded_at > settings.AIRFLOW_DAG_CACHE_TTL:
+            task = self._refreshing.get(key)
+            if task is None or task.done():
+                self._refreshing[key] = asyncio.create_task(
+                    self._background_refresh(key, loader, *args)
+                )
+        return result
+
+    async def _load(
+        self, key: Hashable, loader: Callable[..., Awaitable[dict]], *args
+    ) -> dict:
+        result = await loader(*args)
+        if "error" not in result:
+            self._entries.set(key, (time.monotonic(), result))
+        return result
+
+    async def _background_refresh(
+        self, key: Hashable, loader: Callable[..., Awaitable[dict]], *args
+    ) -> None:
+        try:
+            await self._inflight.do_async(key, self._load, key, loader, *args)
+        except Exception:
+            logger.exception("Falha ao atualizar a lista de DAGs do Airflow")
+        finally:
+            self._refreshing.pop(key, None)
 
+    def clear(self) -> None:
+        self._entries.clear()
 
-class AirflowService:
-    @staticmethod
-    def get_auth() -> HTTPBasicAuth:
-        """Retorna autenticação básica para o Airflow."""
-        username = settings.AIRFLOW_USERNAME if settings.AIRFLOW_USERNAME else "admin"
-        password = settings.AIRFLOW_PASSWORD if settings.AIRFLOW_PASSWORD else "admin"
-        return HTTPBasicAuth(username, password)
-    
-    @staticmethod
-    def get_auth_header() -> dict:
-        """Retorna header de autenticação básica para o Airflow."""
-        username = settings.AIRFLOW_USERNAME if settings.AIRFLOW_USERNAME else "admin"
-        password = settings.AIRFLOW_PASSWORD if settings.AIRFLOW_PASSWORD else "admin"
-        credentials = base64.b64encode(f"{username}:{password}".encode()).decode()
-        return {
-            "Authorization": f"Basic {credentials}",
-            "Content-Type": "application/json"
-        }
-    
-    @staticmethod
-    def get_session():
-        """Cria uma sessão com autenticação para reutilizar."""
-        session = requests.Session()
-        session.headers.update(AirflowService.get_auth_header())
-        session.verify = False
-        return session
 
+_dag_listings = _DagListingCache()
+
+# Estados em que uma execução de DAG ainda não terminou
+ACTIVE_RUN_STATES = ("queued", "running")
+
+# Execução ativa mais recente por DAG ({} quando não há nenhuma)
+_active_runs = TTLCache(maxsize=256, ttl=settings.AIRFLOW_ACTIVE_RUN_CACHE_TTL)
+# Execuções disparadas por esta API, reaproveitadas durante o debounce
+_triggered_runs = TTLCache(maxsize=256, ttl=settings.AIRFLOW_REFRESH_DEBOUNCE_SECONDS)
+_refreshes = SingleFlight()
+
+
+class AirflowService:
     @staticmethod
-    def test_connection() -> dict:
+    async def test_connection() -> dict:
         """Testa a conexão com o Airflow."""
         if not settings.AIRFLOW_URL:
             return {"error": "AIRFLOW_URL not configured", "status": "failed"}
@@ -42,10 +88,7 @@ class AirflowService:
         try:
             # Testa endpoint de health check do Airflow
             health_endpoint = f"{settings.AIRFLOW_URL}/health"
-            session = AirflowService.get_session()
-            
-            # Teste sem autenticação primeiro (health geralmente não precisa)
-            response = requests.get(health_endpoint, verify=False, timeout=10)
+            response = await airflow.get("/health", timeout=10)
             
             health_status = {
                 "health_endpoint": health_endpoint,
@@ -54,10 +97,10 @@ class AirflowService:
             }
             
             # Agora testa o endpoint da API com autenticação
-            api_endpoint = f"{settings.AIRFLOW_URL}/api/v1/dags"
-            api_response = session.get(api_endpoint, timeout=10)
+            api_response = await airflow.get(
+                "/api/v1/dags", params={"limit": 1}, timeout=10
+            )
             
-            auth_header = AirflowService.get_auth_header()
             username = settings.AIRFLOW_USERNAME if settings.AIRFLOW_USERNAME else "admin"
             
             return {
@@ -79,69 +122,78 @@ class AirflowService:
             }
 
     @staticmethod
-    def get_pipelines() -> dict:
-        """Retorna lista de pipelines (DAGs) do Airflow."""
+    async def get_pipelines(
+        dag_id_pattern: str | None = None,
+        only_active: bool | None = None,
+        tags: list[str] | None = None,
+    ) -> dict:
+        """Retorna lista de pipelines (DAGs) do Airflow, servida do cache."""
         if not settings.AIRFLOW_URL:
             return {"error": "AIRFLOW_URL not configured"}
-            
-        # Busca todas as DAGs (paused e unpaused) com limite alto
-        endpoint = f"{settings.AIRFLOW_URL}/api/v1/dags?limit=100"
-        
-        # Tenta primeiro sem parâmetros de query, caso o limit esteja causando problema
-        simple_endpoint = f"{settings.AIRFLOW_URL}/api/v1/dags"
-        
+
+        # Filtros aplicados pelo próprio Airflow
+        filters: dict = {}
+        if dag_id_pattern:
+            filters["dag_id_pattern"] = dag_id_pattern
+        if only_active is not None:
+            filters["only_active"] = str(only_active).lower()
+        if tags:
+            filters["tags"] = list(tags)
+
+        key = (dag_id_pattern, only_active, tuple(sorted(tags or ())))
+        return await _dag_listings.get(key, AirflowService._list_dags, filters)
+
+    @staticmethod
+    async def _list_dags(filters: dict) -> dict:
+        """Busca todas as páginas de DAGs, as seguintes em paralelo."""
+        endpoint = f"{settings.AIRFLOW_URL}/api/v1/dags"
+        page_size = settings.AIRFLOW_PAGE_SIZE
+
         try:
-            session = AirflowService.get_session()
-            
-            # Tenta primeiro com o endpoint simples
-            response = session.get(simple_endpoint, timeout=30)
-            
-            # Se falhar com 401, tenta com credenciais diferentes
-            if response.status_code == 401:
-                # Tenta com usuário/senha em branco
-                session.headers.update({
-                    "Authorization": f"Basic {base64.b64encode(b':').decode()}",
-                    "Content-Type": "application/json"
-                })
-                response = session.get(simple_endpoint, timeout=30)
-
-            if response.status_code == 200:
-                dags = []
-                response_data = response.json()
-                all_dags = response_data.get("dags", [])
-                
-                for dag in all_dags:
-                    dags.append(
-                        {
-                            "id": dag.get("dag_id"),
-                            "description": dag.get("description"),
-                            "timetable_description": dag.get("timetable_description"),
-                            "is_paused": dag.get("is_paused", False),
-                            "is_active": dag.get("is_active", True),
-                            "file_token": dag.get("file_token"),
-                        }
-                    )
-                
-                return {
-                    "dags": dags,
-                    "total_entries": response_data.get("total_entries", len(dags)),
-                    "total_returned": len(dags)
-                }
-            else:
-                # Adiciona informações sobre a autenticação para debug
-                auth_info = {
-                    "username": settings.AIRFLOW_USERNAME if settings.AIRFLOW_USERNAME else "admin",
-                    "password_set": "yes" if settings.AIRFLOW_PASSWORD else "using default",
-                    "url_tested": simple_endpoint
-                }
-                return {
-                    "error": "Failed to retrieve DAGs",
-                    "status_code": response.status_code,
-                    "response": response.text,
-                    "endpoint": endpoint,
-                    "auth_info": auth_info,
-                    "suggestion": "Verifique se o usuário 'admin' e senha 'admin' estão corretos no Airflow ou configure AIRFLOW_USERNAME e AIRFLOW_PASSWORD no .env"
+            response = await AirflowService._fetch_dag_page(filters, 0)
+            if response.status_code != 200:
+                return AirflowService._dag_listing_error(response, endpoint)
+
+            response_data = response.json()
+            all_dags = response_data.get("dags", [])
+            total_entries = response_data.get("total_entries", len(all_dags))
+
+            # Demais páginas por limit/offset, com limite de concorrência
+            semaphore = asyncio.Semaphore(settings.AIRFLOW_MAX_CONCURRENCY)
+
+            async def fetch(offset: int) -> httpx.Response:
+                async with semaphore:
+                    return await AirflowService._fetch_dag_page(filters, offset)
+
+            pages = await asyncio.gather(
+                *(
+                    fetch(offset)
+                    for offset in range(page_size, total_entries, page_size)
+                )
+            )
+
+            for page in pages:
+                if page.status_code != 200:
+                    return AirflowService._dag_listing_error(page, endpoint)
+                all_dags.extend(page.json().get("dags", []))
+
+            dags = [
+                {
+                    "id": dag.get("dag_id"),
+                    "description": dag.get("description"),
+                    "timetable_description": dag.get("timetable_description"),
+                    "is_paused": dag.get("is_paused", False),
+                    "is_active": dag.get("is_active", True),
+                    "file_token": dag.get("file_token"),
                 }
+                for dag in all_dags
+            ]
+
+            return {
+                "dags": dags,
+                "total_entries": total_entries,
+                "total_returned": len(dags)
+            }
         except Exception as e:
             return {
                 "error": "Exception while retrieving DAGs",
@@ -150,27 +202,75 @@ class AirflowService:
             }
 
     @staticmethod
-    def refresh_pipeline(pipeline_id: str) -> dict:
-        """Executa (refresh) uma pipeline específica."""
+    async def _fetch_dag_page(filters: dict, offset: int) -> httpx.Response:
+        return await airflow.get(
+            "/api/v1/dags",
+            params={
+                **filters,
+                "limit": settings.AIRFLOW_PAGE_SIZE,
+                "offset": offset,
+                "order_by": "dag_id",
+            },
+        )
+
+    @staticmethod
+    def _dag_listing_error(response: httpx.Response, endpoint: str) -> dict:
+        # Adiciona informações sobre a autenticação para debug
+        auth_info = {
+            "username": settings.AIRFLOW_USERNAME if settings.AIRFLOW_USERNAME else "admin",
+            "password_set": "yes" if settings.AIRFLOW_PASSWORD else "using default",
+            "url_tested": endpoint
+        }
+        return {
+            "error": "Failed to retrieve DAGs",
+            "status_code": response.status_code,
+            "response": response.text,
+            "endpoint": endpoint,
+            "auth_info": auth_info,
+            "suggestion": "Verifique se o usuário 'admin' e senha 'admin' estão corretos no Airflow ou configure AIRFLOW_USERNAME e AIRFLOW_PASSWORD no .env"
+        }
+
+    @staticmethod
+    async def refresh_pipeline(pipeline_id: str) -> dict:
+        """
+        Executa (refresh) uma pipeline específica. Se a DAG já tem uma execução
+        na fila ou rodando, ou foi disparada dentro da janela de debounce,
+        retorna essa execução em vez de criar outra.
+        """
         if not settings.AIRFLOW_URL:
             raise HTTPException(
                 status_code=500, detail="AIRFLOW_URL not configured"
             )
 
-        endpoint = f"{settings.AIRFLOW_URL}/api/v1/dags/{pipeline_id}/dagRuns"
-        
-        # Gera um dag_run_id único baseado no timestamp
-        dag_run_id = f"manual__{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}"
+        # Pedidos simultâneos para a mesma DAG disparam no máximo uma execução
+        return await _refreshes.do_async(
+            pipeline_id, AirflowService._refresh_pipeline, pipeline_id
+        )
+
+    @staticmethod
+    async def _refresh_pipeline(pipeline_id: str) -> dict:
+        run = _triggered_runs.get(pipeline_id)
+        if run is None:
+            run = await AirflowService._get_active_run(pipeline_id)
+        if run:
+            return AirflowService._refresh_result(
+                "Pipeline is already running", run, already_running=True
+            )
+
+        # Id único mesmo com vários disparos no mesmo segundo
+        now = datetime.now(timezone.utc)
+        dag_run_id = f"manual__{now.strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:8]}"
         
         payload = {
             "dag_run_id": dag_run_id,
-            "logical_date": datetime.now(timezone.utc).isoformat(),
+            "logical_date": now.isoformat(),
             "conf": {}
         }
 
         try:
-            session = AirflowService.get_session()
-            response = session.post(endpoint, json=payload, timeout=30)
+            response = await airflow.post(
+                f"/api/v1/dags/{pipeline_id}/dagRuns", json=payload
+            )
 
             if response.status_code not in [200, 201]:
                 raise HTTPException(
@@ -179,12 +279,11 @@ class AirflowService:
                 )
 
             result = response.json()
-            return {
-                "message": "Pipeline refreshed successfully",
-                "dag_run_id": result.get("dag_run_id"),
-                "logical_date": result.get("logical_date"),
-                "state": result.get("state")
-            }
+            _triggered_runs.set(pipeline_id, result)
+            _active_runs.set(pipeline_id, result)
+            return AirflowService._refresh_result(
+                "Pipeline refreshed successfully", result, already_running=False
+            )
         except HTTPException:
             raise
         except Exception as e:
@@ -194,14 +293,72 @@ class AirflowService:
             )
 
     @staticmethod
-    def get_all_pipeline_associations() -> dict:
+    async def _get_active_run(pipeline_id: str) -> dict:
+        """Execução na fila ou rodando da DAG ({} se não houver), em cache curto."""
+        run = _active_runs.get(pipeline_id)
+        if run is not None:
+            return run
+
+        try:
+            response = await airflow.get(
+                f"/api/v1/dags/{pipeline_id}/dagRuns",
+                params={
+                    "state": list(ACTIVE_RUN_STATES),
+                    "order_by": "-execution_date",
+                    "limit": 1,
+                },
+            )
+        except httpx.HTTPError:
+            logger.warning("Falha ao consultar execuções ativas de %s", pipeline_id)
+            return {}
+        if response.status_code != 200:
+            # Sem a consulta o refresh segue e o Airflow decide
+            logger.warning(
+                "Falha ao consultar execuções ativas de %s: %s",
+                pipeline_id,
+                response.status_code,
+            )
+            return {}
+
+        runs = response.json().get("dag_runs", [])
+        run = runs[0] if runs else {}
+        _active_runs.set(pipeline_id, run)
+        return run
+
+    @staticmethod
+    async def get_latest_run(pipeline_id: str) -> dict | None:
+        """Retorna a execução mais recente da DAG, ou None se não houver."""
+        response = await airflow.get(
+            f"/api/v1/dags/{pipeline_id}/dagRuns",
+            params={"order_by": "-execution_date", "limit": 1},
+        )
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Failed to retrieve DAG runs: {response.text}",
+            )
+
+        runs = response.json().get("dag_runs", [])
+        return runs[0] if runs else None
+
+    @staticmethod
+    def _refresh_result(message: str, run: dict, already_running: bool) -> dict:
+        return {
+            "message": message,
+            "dag_run_id": run.get("dag_run_id"),
+            "logical_date": run.get("logical_date"),
+            "state": run.get("state"),
+            "already_running": already_running,
+        }
+
+    @staticmethod
+    async def get_all_pipeline_associations() -> dict:
         """Retorna todas as associações entre pipelines e dashboards."""
         try:
-            response = requests.get(
-                settings.POCKETBASE_URL
-                + "/api/collections/pipelines_dashboards/records",
-                headers={"Content-Type": "application/json"},
-                verify=False,
+            response = (
+                await pocketbase.get("/api/collections/pipelines_dashboards/records")
             ).json()
 
             if "items" not in response:
@@ -217,17 +374,18 @@ class AirflowService:
             raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
     @staticmethod
-    def get_dashboard_pipeline_association(dashboard_id: str) -> dict:
+    async def get_dashboard_pipeline_association(dashboard_id: str) -> dict:
         """Retorna a associação de pipeline para um dashboard específico."""
+        if access_replica.ready:
+            associations = access_replica.dashboard_pipelines(dashboard_id)
+            return associations[0] if associations else None
+
         try:
-            url = (
-                settings.POCKETBASE_URL
-                + f"/api/collections/pipelines_dashboards/records?filter=(dashboard_id='{dashboard_id}')"
-            )
-            response = requests.get(
-                url,
-                headers={"Content-Type": "application/json"},
-                verify=False,
+            response = (
+                await pocketbase.get(
+                    "/api/collections/pipelines_dashboards/records",
+                    params={"filter": f"dashboard_id={quote(dashboard_id)}"},
+                )
             ).json()
 
             if "items" not in response or len(response["items"]) == 0:
@@ -241,14 +399,14 @@ class AirflowService:
             raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
     @staticmethod
-    def get_pipeline_association(pipeline_id: str) -> dict:
+    async def get_pipeline_association(pipeline_id: str) -> dict:
         """Retorna a associação de dashboard para uma pipeline específica."""
         try:
-            response = requests.get(
-                settings.POCKETBASE_URL
-                + f"/api/collections/pipelines_dashboards/records?filter=pipeline_id='{pipeline_id}'",
-                headers={"Content-Type": "application/json"},
-                verify=False,
+            response = (
+                await pocketbase.get(
+                    "/api/collections/pipelines_dashboards/records",
+                    params={"filter": f"pipeline_id={quote(pipeline_id)}"},
+                )
             ).json()
 
             if "items" not in response:
@@ -264,15 +422,14 @@ class AirflowService:
             raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
     @staticmethod
-    def create_pipeline_association(dashboard_id: str, pipeline_id: str) -> dict:
+    async def create_pipeline_association(dashboard_id: str, pipeline_id: str) -> dict:
         """Cria uma associação entre pipeline e dashboard."""
         try:
-            response = requests.post(
-                settings.POCKETBASE_URL
-                + "/api/collections/pipelines_dashboards/records",
-                headers={"Content-Type": "application/json"},
-                json={"dashboard_id": dashboard_id, "pipeline_id": pipeline_id},
-                verify=False,
+            response = (
+                await pocketbase.post(
+                    "/api/collections/pipelines_dashboards/records",
+                    json={"dashboard_id": dashboard_id, "pipeline_id": pipeline_id},
+                )
             ).json()
 
             if "error" in response:
@@ -280,6 +437,7 @@ class AirflowService:
                     status_code=400, detail=f"Error: {response['error']}"
                 )
 
+            access_replica.apply("pipelines_dashboards", "create", response)
             return response
 
         except HTTPException:
@@ -288,15 +446,15 @@ class AirflowService:
             raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
     @staticmethod
-    def delete_pipeline_association(dashboard_id: str) -> dict:
+    async def delete_pipeline_association(dashboard_id: str) -> dict:
         """Deleta a associação de pipeline para um dashboard."""
         try:
             # Primeiro busca a associação para obter o ID do registro
-            search_response = requests.get(
-                settings.POCKETBASE_URL
-                + f"/api/collections/pipelines_dashboards/records?filter=dashboard_id='{dashboard_id}'",
-                headers={"Content-Type": "application/json"},
-                verify=False,
+            search_response = (
+                await pocketbase.get(
+                    "/api/collections/pipelines_dashboards/records",
+                    params={"filter": f"dashboard_id={quote(dashboard_id)}"},
+                )
             ).json()
 
             if "items" not in search_response or len(search_response["items"]) == 0:
@@ -305,17 +463,16 @@ class AirflowService:
                 )
 
             # Pega o ID do primeiro registro encontrado
-            record_id = search_response["items"][0]["id"]
+            association = search_response["items"][0]
+            record_id = association["id"]
 
             # Deleta o registro usando o ID
-            delete_response = requests.delete(
-                settings.POCKETBASE_URL
-                + f"/api/collections/pipelines_dashboards/records/{record_id}",
-                headers={"Content-Type": "application/json"},
-                verify=False,
+            delete_response = await pocketbase.delete(
+                f"/api/collections/pipelines_dashboards/records/{record_id}",
             )
 
             if delete_response.status_code == 204:
+                access_replica.apply("pipelines_dashboards", "delete", association)
                 return {"message": "Pipeline association removed successfully"}
             else:
                 raise HTTPException(
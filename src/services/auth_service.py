@@ -1,27 +1,125 @@
-import requests
+import base64
+import hashlib
+import json
+import time
 from fastapi import HTTPException
+from clients.pocketbase import pocketbase
 from config import settings
+from utils.cache import TTLCache
+from utils.singleflight import SingleFlight
+
+
+INVALID_TOKEN_DETAIL = "Token inválido ou expirado"
+
+# Sentinela para tokens recusados (cache negativo)
+_REJECTED = object()
+
+_verified_tokens = TTLCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE, ttl=settings.AUTH_TOKEN_CACHE_TTL
+)
+_inflight = SingleFlight()
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _token_lifetime(token: str) -> float | None:
+    """Segundos até a expiração declarada no token (None se não houver)."""
+    try:
+        claims = json.loads(_b64decode(token.split(".")[1]))
+        return float(claims["exp"]) - time.time()
+    except (ValueError, IndexError, KeyError, TypeError):
+        return None
+
+
+def _token_ttl(token: str) -> float:
+    """TTL do cache positivo, nunca além da expiração declarada no token."""
+    ttl = settings.AUTH_TOKEN_CACHE_TTL
+    lifetime = _token_lifetime(token)
+    return ttl if lifetime is None else min(ttl, lifetime)
+
+
+def _invalid_token() -> HTTPException:
+    return HTTPException(
+        status_code=401,
+        detail=INVALID_TOKEN_DETAIL,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
 
 class AuthService:
     @staticmethod
-    def verify_token(token: str) -> dict:
-        """Verifica o token de autenticação do usuário no PocketBase."""
+    async def verify_token(token: str) -> dict:
+        """Verifica o token de autenticação do usuário no PocketBase.
+
+        O resultado do auth-refresh (inclusive recusas) fica em cache pelo
+        hash do token.
+        """
+        cache_key = _token_cache_key(token)
+        cached = _verified_tokens.get(cache_key)
+        if cached is _REJECTED:
+            raise _invalid_token()
+        if cached is not None:
+            return cached
+
+        # Requisições simultâneas com o mesmo token compartilham a verificação
+        return await _inflight.do_async(
+            cache_key, AuthService._verify_uncached, token, cache_key
+        )
+
+    @staticmethod
+    async def _verify_uncached(token: str, cache_key: str) -> dict:
+        """Verifica o token no auth-refresh e grava o resultado no cache."""
         try:
-            response = requests.post(
-                settings.POCKETBASE_URL + "/api/collections/auth_users/auth-refresh",
+            user_data = await AuthService._refresh_token(token)
+        except HTTPException as exc:
+            # Não encurta a recusa de um token revogado durante a verificação
+            revoked = _verified_tokens.get(cache_key) is _REJECTED
+            if exc.detail == INVALID_TOKEN_DETAIL and not revoked:
+                _verified_tokens.set(
+                    cache_key, _REJECTED, ttl=settings.AUTH_TOKEN_NEGATIVE_TTL
+                )
+            raise
+
+        # Logout durante a verificação: o token não volta ao cache como válido
+        if _verified_tokens.get(cache_key) is _REJECTED:
+            raise _invalid_token()
+
+        _verified_tokens.set(cache_key, user_data, ttl=_token_ttl(token))
+        return user_data
+
+    @staticmethod
+    def revoke_token(token: str) -> None:
+        """Recusa o token nesta instância até a sua expiração (logout)."""
+        lifetime = _token_lifetime(token)
+        ttl = settings.AUTH_TOKEN_REVOCATION_TTL if lifetime is None else lifetime
+        _verified_tokens.set(_token_cache_key(token), _REJECTED, ttl=ttl)
+
+    @staticmethod
+    def cache_stats() -> dict:
+        """Retorna os contadores dos caches de autenticação."""
+        return {"tokens": _verified_tokens.stats()}
+
+    @staticmethod
+    async def _refresh_token(token: str) -> dict:
+        """Valida o token chamando o auth-refresh do PocketBase."""
+        try:
+            response = await pocketbase.post(
+                "/api/collections/auth_users/auth-refresh",
                 headers={"Authorization": f"Bearer {token}"},
-                verify=False,
             )
 
             if response.status_code == 200:
                 return response.json()
             else:
-                raise HTTPException(
-                    status_code=401,
-                    detail="Token inválido ou expirado",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
+                raise _invalid_token()
+        except HTTPException:
+            raise
         except Exception:
             raise HTTPException(
                 status_code=401,
@@ -30,14 +128,13 @@ class AuthService:
             )
 
     @staticmethod
-    def login(email: str, password: str) -> dict:
+    async def login(email: str, password: str) -> dict:
         """Autentica o usuário com email e senha."""
-        user_data = requests.post(
-            settings.POCKETBASE_URL + "/api/collections/auth_users/auth-with-password",
-            headers={"Content-Type": "application/json"},
+        response = await pocketbase.post(
+            "/api/collections/auth_users/auth-with-password",
             json={"identity": email, "password": password},
-            verify=False,
-        ).json()
+        )
+        user_data = response.json()
 
         if "token" in user_data and "record" in user_data:
             return {
@@ -55,7 +152,7 @@ class AuthService:
         return {"error": "Invalid credentials"}
 
     @staticmethod
-    def register(
+    async def register(
         username: str, email: str, password: str, confirm_password: str, role: str
     ) -> dict:
         """Registra um novo usuário."""
@@ -65,9 +162,8 @@ class AuthService:
             )
 
         try:
-            response = requests.post(
-                settings.POCKETBASE_URL + "/api/collections/auth_users/records",
-                headers={"Content-Type": "application/json"},
+            response = await pocketbase.post(
+                "/api/collections/auth_users/records",
                 json={
                     "username": username,
                     "email": email,
@@ -76,7 +172,6 @@ class AuthService:
                     "emailVisibility": True,
                     "role": role,
                 },
-                verify=False,
             )
 
             if response.status_code == 200:
@@ -0,0 +1,64 @@
+from collections.abc import Awaitable, Callable
+from utils.cache import TTLCache
+from utils.singleflight import SingleFlight
+
+
+class EntitlementCache:
+    """
+    Cache materializado de usuário → ids dos dashboards que ele pode ver.
+
+    Guarda também o índice reverso grupo → usuários em cache, para que uma
+    alteração num grupo invalide apenas os usuários afetados. O `loader`
+    recebe o id do usuário e retorna `(group_ids, dashboard_ids)`.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Awaitable[tuple[list[str], set[str]]]],
+        maxsize: int,
+        ttl: float,
+    ):
+        self.loader = loader
+        self._dashboards = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._users_by_group: dict[str, set[str]] = {}
+        self._generation = 0
+        self._inflight = SingleFlight()
+
+    async def get(self, user_id: str) -> frozenset[str]:
+        """Retorna os ids dos dashboards visíveis para o usuário."""
+        dashboard_ids = self._dashboards.get(user_id)
+        if dashboard_ids is not None:
+            return dashboard_ids
+
+        return await self._inflight.do_async(user_id, self._load, user_id)
+
+    async def _load(self, user_id: str) -> frozenset[str]:
+        generation = self._generation
+        group_ids, dashboard_ids = await self.loader(user_id)
+        dashboard_ids = frozenset(dashboard_ids)
+
+        # Uma invalidação durante a carga pode ter tornado o resultado obsoleto
+        if generation == self._generation:
+            self._dashboards.set(user_id, dashboard_ids)
+            for group_id in group_ids:
+                self._users_by_group.setdefault(group_id, set()).add(user_id)
+        return dashboard_ids
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Descarta as permissões em cache de um usuário."""
+        self._generation += 1
+        self._dashboards.pop(user_id)
+
+    def invalidate_group(self, group_id: str) -> None:
+        """Descarta as permissões em cache de todos os usuários do grupo."""
+        self._generation += 1
+        for user_id in self._users_by_group.pop(group_id, set()):
+            self._dashboards.pop(user_id)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._dashboards.clear()
+        self._users_by_group.clear()
+
+    def stats(self) -> dict:
+        return {**self._dashboards.stats(), "groups": len(self._users_by_group)}
@@ -0,0 +1,43 @@
+import json
+from collections.abc import AsyncIterator, Callable
+from clients.pocketbase import pocketbase
+from services.user_service import UserService
+
+
+def _to_membership(record: dict) -> dict:
+    return {
+        "id": record.get("id", ""),
+        "group_id": record.get("group_id", ""),
+        "user_id": record.get("user_id", ""),
+        "created": record.get("created", ""),
+        "updated": record.get("updated", ""),
+    }
+
+
+class ExportService:
+    @staticmethod
+    def export_users() -> AsyncIterator[str]:
+        """Exporta todos os usuários em NDJSON."""
+        return ExportService._export("auth_users", UserService._to_user)
+
+    @staticmethod
+    def export_groups() -> AsyncIterator[str]:
+        """Exporta todos os grupos em NDJSON."""
+        return ExportService._export("groups", UserService._to_group)
+
+    @staticmethod
+    def export_memberships() -> AsyncIterator[str]:
+        """Exporta todos os vínculos entre usuários e grupos em NDJSON."""
+        return ExportService._export("groups_users", _to_membership)
+
+    @staticmethod
+    async def _export(
+        collection: str, to_row: Callable[[dict], dict]
+    ) -> AsyncIterator[str]:
+        """Gera uma linha JSON por registro, lendo uma página por vez."""
+        async for page in pocketbase.iter_pages(collection, sort="created,id"):
+            if page:
+                yield "".join(
+                    json.dumps(to_row(record), ensure_ascii=False) + "\n"
+                    for record in page
+                )
@@ -1,205 +1,405 @@
-import requests
 from fastapi import HTTPException
+from clients.pocketbase import pocketbase, quote
 from config import settings
+from services.access_replica import access_replica
+from services.entitlements import EntitlementCache
+from services.user_service import UserService
+from utils.singleflight import SingleFlight
+
+_inflight = SingleFlight()
 
 
 class GroupService:
     @staticmethod
-    def get_group(group_id: str) -> dict:
+    async def get_group(group_id: str) -> dict:
         """Retorna os dados de um grupo específico."""
-        group = requests.get(
-            settings.POCKETBASE_URL + f"/api/collections/groups/records/{group_id}",
-            headers={"Content-Type": "application/json"},
-            verify=False,
-        ).json()
-        return group
+        response = await pocketbase.get(
+            f"/api/collections/groups/records/{group_id}",
+        )
+        return response.json()
 
     @staticmethod
-    def get_groups() -> dict:
+    async def get_groups() -> dict:
         """Retorna lista de grupos."""
-        groups = requests.get(
-            settings.POCKETBASE_URL + "/api/collections/groups/records",
-            verify=False,
-        )
+        return await _inflight.do_async("groups", GroupService._fetch_groups)
+
+    @staticmethod
+    async def _fetch_groups() -> dict:
+        groups = await pocketbase.get("/api/collections/groups/records")
         return groups.json()
 
     @staticmethod
-    def create_group(name: str, description: str, active: bool = True) -> dict:
+    async def create_group(name: str, description: str, active: bool = True) -> dict:
         """Cria um novo grupo."""
-        group = requests.post(
-            settings.POCKETBASE_URL + "/api/collections/groups/records",
-            headers={"Content-Type": "application/json"},
+        response = await pocketbase.post(
+            "/api/collections/groups/records",
             json={"name": name, "description": description, "active": active},
-            verify=False,
-        ).json()
-        return group
+        )
+        return response.json()
 
     @staticmethod
-    def update_group(group_id: str, update_data: dict) -> dict:
+    async def update_group(group_id: str, update_data: dict) -> dict:
         """Atualiza os dados de um grupo."""
-        group = requests.patch(
-            settings.POCKETBASE_URL + f"/api/collections/groups/records/{group_id}",
-            headers={"Content-Type": "application/json"},
+        response = await pocketbase.patch(
+            f"/api/collections/groups/records/{group_id}",
             json=update_data,
-            verify=False,
-        ).json()
+        )
+        group = response.json()
+
+        access_replica.apply("groups", "update", group)
+        if "active" in update_data:
+            entitlements.invalidate_group(group_id)
         return group
 
     @staticmethod
-    def delete_group(group_id: str) -> dict:
+    async def delete_group(group_id: str) -> dict:
         """Deleta um grupo."""
-        response = requests.delete(
-            settings.POCKETBASE_URL + f"/api/collections/groups/records/{group_id}",
-            headers={"Content-Type": "application/json"},
-            verify=False,
+        response = await pocketbase.delete(
+            f"/api/collections/groups/records/{group_id}",
         )
 
+        entitlements.invalidate_group(group_id)
         if response.status_code == 204:
+            access_replica.apply("groups", "delete", {"id": group_id})
             return {"message": "Group deleted successfully"}
         else:
             return {"error": "Failed to delete group"}
 
     @staticmethod
-    def get_group_users(group_id: str) -> list:
-        """Retorna lista de usuários de um grupo."""
-        group_users = requests.get(
-            settings.POCKETBASE_URL
-            + f"/api/collections/groups_users/records?filter=(group_id='{group_id}')",
-            headers={"Content-Type": "application/json"},
-            verify=False,
-        ).json()
+    async def get_group_users(group_id: str, page: int = 1, per_page: int = 30) -> list:
+        """Retorna uma página da lista de usuários de um grupo."""
+        if access_replica.ready:
+            start = (page - 1) * per_page
+            memberships = access_replica.group_memberships(group_id)[
+                start : start + per_page
+            ]
+        else:
+            response = await pocketbase.get(
+                "/api/collections/groups_users/records",
+                params={
+                    "filter": f"(group_id={quote(group_id)})",
+                    "page": page,
+                    "perPage": per_page,
+                    "skipTotal": 1,
+                },
+            )
+            memberships = response.json()["items"]
+
+        # Resolve os usuários da página numa única consulta em lote
+        user_records = await pocketbase.list_any(
+            "auth_users", "id", [membership["user_id"] for membership in memberships]
+        )
+        users_by_id = {user_record["id"]: user_record for user_record in user_records}
 
         users = []
-        for user in group_users["items"]:
-            user_record = requests.get(
-                settings.POCKETBASE_URL
-                + f"/api/collections/auth_users/records/{user['user_id']}",
-                headers={"Content-Type": "application/json"},
-                verify=False,
-            ).json()
+        for membership in memberships:
+            user_record = users_by_id.get(membership["user_id"])
+
+            # Usuários já removidos são ignorados
+            if user_record is None:
+                continue
 
             users.append(
                 {
-                    "id": user["id"],
+                    "id": membership["id"],
                     "user_id": user_record["id"],
-                    "username": user_record["username"],
-                    "email": user_record["email"],
-                    "role": user_record["role"],
-                    "active": user_record["active"],
-                    "created": user_record["created"],
-                    "updated": user_record["updated"],
+                    "username": user_record.get("username", ""),
+                    "email": user_record.get("email", ""),
+                    "role": user_record.get("role", ""),
+                    "active": user_record.get("active", False),
+                    "created": user_record.get("created", ""),
+                    "updated": user_record.get("updated", ""),
                 }
             )
 
         return users
 
     @staticmethod
-    def get_group_dashboards(group_id: str, all_dashboards: list) -> list:
-        """Retorna lista de dashboards de um grupo."""
-        group_dashboards = requests.get(
-            settings.POCKETBASE_URL
-            + f"/api/collections/groups_dashboards/records?filter=(group_id='{group_id}')",
-            headers={"Content-Type": "application/json"},
-            verify=False,
-        ).json()
+    async def get_group_dashboards(group_id: str, dashboards_by_id: dict) -> list:
+        """Retorna lista de dashboards de um grupo (indexados por id do relatório)."""
+        if access_replica.ready:
+            group_dashboards = access_replica.group_dashboards(group_id)
+        else:
+            group_dashboards = await pocketbase.list_all(
+                "groups_dashboards", filter=f"group_id={quote(group_id)}"
+            )
 
         dashboards: list[dict] = []
-        for group_dashboard in group_dashboards["items"]:
-            dashboard_id = group_dashboard.get("dashboard_id")
-
-            for dashboard in all_dashboards:
-                if dashboard.get("id") == dashboard_id:
-                    dashboards.append(dashboard)
-                    break
+        for group_dashboard in group_dashboards:
+            dashboard = dashboards_by_id.get(group_dashboard.get("dashboard_id"))
+            if dashboard is not None:
+                dashboards.append(dashboard)
 
         return dashboards
 
     @staticmethod
-    def add_user_to_group(group_id: str, user_id: str) -> dict:
-        """Adiciona um usuário a um grupo."""
-        association = requests.post(
-            settings.POCKETBASE_URL + "/api/collections/groups_users/records",
-            headers={"Content-Type": "application/json"},
-            json={"group_id": group_id, "user_id": user_id},
-            verify=False,
-        ).json()
-        return association
+    async def get_dashboard_ids(group_ids: list[str]) -> set[str]:
+        """Retorna os ids dos dashboards vinculados a qualquer um dos grupos."""
+        if not group_ids:
+            return set()
+
+        if access_replica.ready:
+            return {
+                item.get("dashboard_id")
+                for group_id in group_ids
+                for item in access_replica.group_dashboards(group_id)
+            }
+
+        group_dashboards = await pocketbase.list_any(
+            "groups_dashboards", "group_id", group_ids
+        )
+        return {item.get("dashboard_id") for item in group_dashboards}
 
     @staticmethod
-    def remove_user_from_group(group_id: str, user_id: str) -> dict:
-        """Remove um usuário de um grupo."""
-        try:
-            group_users = requests.get(
-                settings.POCKETBASE_URL
-                + f"/api/collections/groups_users/records?filter=(group_id='{group_id}')",
-                headers={"Content-Type": "application/json"},
-                verify=False,
-            ).json()
-
-            for group_user in group_users["items"]:
-                if group_user["user_id"] == user_id:
-                    response = requests.delete(
-                        settings.POCKETBASE_URL
-                        + f"/api/collections/groups_users/records/{group_user['id']}",
-                        headers={"Content-Type": "application/json"},
-                        verify=False,
-                    ).json()
-                    return response
-
-            return group_users
+    async def get_user_dashboard_ids(user_id: str) -> frozenset[str]:
+        """Retorna os ids dos dashboards visíveis para o usuário (em cache)."""
+        return await entitlements.get(user_id)
 
+    @staticmethod
+    async def _load_entitlements(user_id: str) -> tuple[list[str], set[str]]:
+        """Calcula os grupos do usuário e os dashboards liberados por eles."""
+        group_ids = await UserService.get_user_group_ids(user_id)
+        return group_ids, await GroupService.get_dashboard_ids(group_ids)
+
+    @staticmethod
+    async def add_users_to_group(group_id: str, user_ids: list[str]) -> dict:
+        """Adiciona vários usuários a um grupo, ignorando os que já pertencem."""
+        results = await GroupService._bulk_link(
+            "groups_users", group_id, "user_id", user_ids
+        )
+        for result in results:
+            if result["status"] == "added":
+                entitlements.invalidate_user(result["user_id"])
+        return GroupService._bulk_report(results)
+
+    @staticmethod
+    async def remove_users_from_group(group_id: str, user_ids: list[str]) -> dict:
+        """Remove vários usuários de um grupo."""
+        results = await GroupService._bulk_unlink(
+            "groups_users", group_id, "user_id", user_ids
+        )
+        for result in results:
+            if result["status"] == "removed":
+                entitlements.invalidate_user(result["user_id"])
+        return GroupService._bulk_report(results)
+
+    @staticmethod
+    async def add_dashboards_to_group(group_id: str, dashboard_ids: list[str]) -> dict:
+        """Vincula vários dashboards a um grupo, ignorando os já vinculados."""
+        results = await GroupService._bulk_link(
+            "groups_dashboards", group_id, "dashboard_id", dashboard_ids
+        )
+        entitlements.invalidate_group(group_id)
+        return GroupService._bulk_report(results)
+
+    @staticmethod
+    async def remove_dashboards_from_group(
+        group_id: str, dashboard_ids: list[str]
+    ) -> dict:
+        """Desvincula vários dashboards de um grupo."""
+        results = await GroupService._bulk_unlink(
+            "groups_dashboards", group_id, "dashboard_id", dashboard_ids
+        )
+        entitlements.invalidate_group(group_id)
+        return GroupService._bulk_report(results)
+
+    @staticmethod
+    async def _find_links(
+        collection: str, group_id: str, field: str, values: list[str]
+    ) -> dict[str, list[dict]]:
+        """Retorna os vínculos do grupo com os valores dados, agrupados por valor."""
+        records = await pocketbase.list_any(
+            collection, field, values, filter=f"group_id={quote(group_id)}"
+        )
+        links: dict[str, list[dict]] = {}
+        for record in records:
+            links.setdefault(record.get(field), []).append(record)
+        return links
+
+    @staticmethod
+    async def _bulk_link(
+        collection: str, group_id: str, field: str, values: list[str]
+    ) -> list[dict]:
+        """Cria via /api/batch os vínculos que ainda não existem."""
+        values = list(dict.fromkeys(values))
+        existing = await GroupService._find_links(collection, group_id, field, values)
+
+        missing = [value for value in values if value not in existing]
+        responses = await pocketbase.batch(
+            [
+                {
+                    "method": "POST",
+                    "url": f"/api/collections/{collection}/records",
+                    "body": {"group_id": group_id, field: value},
+                }
+                for value in missing
+            ]
+        )
+        created = dict(zip(missing, responses))
+
+        results = []
+        for value in values:
+            if value in existing:
+                results.append(
+                    {field: value, "status": "exists", "id": existing[value][0]["id"]}
+                )
+                continue
+
+            response = created[value]
+            if response.get("status") == 200:
+                record = response["body"]
+                access_replica.apply(collection, "create", record)
+                results.append({field: value, "status": "added", "id": record["id"]})
+            else:
+                results.append(
+                    {field: value, "status": "failed", "error": response.get("body")}
+                )
+        return results
+
+    @staticmethod
+    async def _bulk_unlink(
+        collection: str, group_id: str, field: str, values: list[str]
+    ) -> list[dict]:
+        """Remove via /api/batch todos os vínculos (inclusive duplicados)."""
+        values = list(dict.fromkeys(values))
+        existing = await GroupService._find_links(collection, group_id, field, values)
+
+        records = [record for value in values for record in existing.get(value, [])]
+        responses = await pocketbase.batch(
+            [
+                {
+                    "method": "DELETE",
+                    "url": f"/api/collections/{collection}/records/{record['id']}",
+                }
+                for record in records
+            ]
+        )
+
+        failures: dict[str, dict] = {}
+        for record, response in zip(records, responses):
+            if response.get("status") == 204:
+                access_replica.apply(collection, "delete", record)
+            else:
+                failures[record.get(field)] = response.get("body")
+
+        results = []
+        for value in values:
+            if value not in existing:
+                results.append({field: value, "status": "not_found"})
+            elif value in failures:
+                results.append(
+                    {field: value, "status": "failed", "error": failures[value]}
+                )
+            else:
+                results.append({field: value, "status": "removed"})
+        return results
+
+    @staticmethod
+    def _bulk_report(results: list[dict]) -> dict:
+        summary: dict[str, int] = {}
+        for result in results:
+            summary[result["status"]] = summary.get(result["status"], 0) + 1
+        return {"results": results, "summary": summary}
+
+    @staticmethod
+    def _on_access_change(collection: str | None, old: dict | None, new: dict | None):
+        """Invalida as permissões afetadas por uma alteração na réplica."""
+        if collection is None:
+            entitlements.clear()
+            return
+
+        for record in (old, new):
+            if record is None:
+                continue
+            if collection == "groups_users":
+                entitlements.invalidate_user(record.get("user_id"))
+            elif collection == "groups_dashboards":
+                entitlements.invalidate_group(record.get("group_id"))
+            elif collection == "groups":
+                entitlements.invalidate_group(record["id"])
+
+    @staticmethod
+    async def add_user_to_group(group_id: str, user_id: str) -> dict:
+        """Adiciona um usuário a um grupo (ou retorna o vínculo existente)."""
+        membership = await GroupService._link(
+            "groups_users", group_id, "user_id", user_id
+        )
+
+        entitlements.invalidate_user(user_id)
+        return membership
+
+    @staticmethod
+    async def remove_user_from_group(group_id: str, user_id: str) -> dict:
+        """Remove um usuário de um grupo (inclusive vínculos duplicados)."""
+        try:
+            result = await GroupService.remove_users_from_group(group_id, [user_id])
         except Exception as e:
             return {"error": str(e)}
 
+        status = result["results"][0]["status"]
+        if status == "removed":
+            return {"message": "User removed from group successfully"}
+        if status == "not_found":
+            return {"error": "User not found in this group"}
+        return {"error": "Failed to remove user from group"}
+
     @staticmethod
-    def add_dashboard_to_group(group_id: str, dashboard_id: str) -> dict:
-        """Adiciona um dashboard a um grupo."""
-        association = requests.post(
-            settings.POCKETBASE_URL + "/api/collections/groups_dashboards/records",
-            headers={"Content-Type": "application/json"},
-            json={"group_id": group_id, "dashboard_id": dashboard_id},
-            verify=False,
-        ).json()
-        return association
+    async def add_dashboard_to_group(group_id: str, dashboard_id: str) -> dict:
+        """Adiciona um dashboard a um grupo (ou retorna o vínculo existente)."""
+        group_dashboard = await GroupService._link(
+            "groups_dashboards", group_id, "dashboard_id", dashboard_id
+        )
+
+        entitlements.invalidate_group(group_id)
+        return group_dashboard
 
     @staticmethod
-    def remove_dashboard_from_group(group_id: str, dashboard_id: str) -> dict:
-        """Remove um dashboard de um grupo."""
+    async def remove_dashboard_from_group(group_id: str, dashboard_id: str) -> dict:
+        """Remove um dashboard de um grupo (inclusive vínculos duplicados)."""
         try:
-            group_dashboards = requests.get(
-                settings.POCKETBASE_URL
-                + f"/api/collections/groups_dashboards/records?filter=(group_id='{group_id}')",
-                headers={"Content-Type": "application/json"},
-                verify=False,
-            ).json()
-
-            if "items" not in group_dashboards:
-                raise HTTPException(
-                    status_code=404, detail="No dashboards found for this group"
-                )
-
-            for group_dashboard in group_dashboards["items"]:
-                if group_dashboard.get("dashboard_id") == dashboard_id:
-                    response = requests.delete(
-                        settings.POCKETBASE_URL
-                        + f"/api/collections/groups_dashboards/records/{group_dashboard['id']}",
-                        headers={"Content-Type": "application/json"},
-                        verify=False,
-                    )
-
-                    if response.status_code == 204:
-                        return {"message": "Dashboard removed from group successfully"}
-                    else:
-                        raise HTTPException(
-                            status_code=response.status_code,
-                            detail="Failed to remove dashboard",
-                        )
+            result = await GroupService.remove_dashboards_from_group(
+                group_id, [dashboard_id]
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+        status = result["results"][0]["status"]
+        if status == "removed":
+            return {"message": "Dashboard removed from group successfully"}
+        if status == "not_found":
             raise HTTPException(
                 status_code=404, detail="Dashboard not found in this group"
             )
+        raise HTTPException(status_code=500, detail="Failed to remove dashboard")
 
-        except HTTPException:
-            raise
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    @staticmethod
+    async def _link(collection: str, group_id: str, field: str, value: str) -> dict:
+        """
+        Cria o vínculo do grupo com o valor, ou retorna o já existente.
+        Levanta HTTPException com o erro do PocketBase se a criação falhar.
+        """
+        existing = await GroupService._find_links(collection, group_id, field, [value])
+        if value in existing:
+            return existing[value][0]
+
+        response = await pocketbase.post(
+            f"/api/collections/{collection}/records",
+            json={"group_id": group_id, field: value},
+        )
+        if response.status_code != 200:
+            # Recusado pelo PocketBase: nada muda na réplica nem no cache
+            raise HTTPException(
+                status_code=response.status_code, detail=response.json()
+            )
+
+        record = response.json()
+        access_replica.apply(collection, "create", record)
+        return record
+
+
+entitlements = EntitlementCache(
+    loader=GroupService._load_entitlements,
+    maxsize=settings.ENTITLEMENT_CACHE_SIZE,
+    ttl=settings.ENTITLEMENT_CACHE_TTL,
+)
+access_replica.add_listener(GroupService._on_access_change)
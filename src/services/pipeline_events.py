@@ -0,0 +1,129 @@
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
+from clients.airflow import airflow
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Estados em que uma execução de DAG não muda mais
+TERMINAL_RUN_STATES = ("success", "failed")
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _to_run_state(pipeline_id: str, run: dict) -> dict:
+    return {
+        "pipeline_id": pipeline_id,
+        "dag_run_id": run.get("dag_run_id"),
+        "state": run.get("state"),
+        "start_date": run.get("start_date"),
+        "end_date": run.get("end_date"),
+    }
+
+
+class _RunPoller:
+    """
+    Consulta uma execução de DAG e repassa cada mudança de estado aos
+    inscritos. Para no estado terminal ou quando o último inscrito sai.
+    """
+
+    def __init__(self, watcher: "PipelineRunWatcher", key: tuple[str, str]):
+        self._watcher = watcher
+        self.pipeline_id, self.dag_run_id = key
+        self.key = key
+        self.last: dict | None = None
+        self.subscribers: set[asyncio.Queue] = set()
+        self.task: asyncio.Task | None = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        if self.last is not None:
+            # Quem chega depois recebe o último estado conhecido na hora
+            queue.put_nowait(self.last)
+        self.subscribers.add(queue)
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+        if not self.subscribers:
+            self._watcher._forget(self)
+            if self.task is not None:
+                self.task.cancel()
+
+    def _publish(self, message: dict) -> None:
+        self.last = message
+        for queue in self.subscribers:
+            queue.put_nowait(message)
+
+    async def _run(self) -> None:
+        path = f"/api/v1/dags/{self.pipeline_id}/dagRuns/{self.dag_run_id}"
+        try:
+            while True:
+                try:
+                    response = await airflow.get(path)
+                except Exception:
+                    # Falha transitória: tenta de novo no próximo ciclo
+                    logger.warning("Falha ao consultar a execução %s", path)
+                else:
+                    if response.status_code == 404:
+                        self._publish({"error": "DAG run not found", "final": True})
+                        return
+                    if response.status_code == 200:
+                        state = _to_run_state(self.pipeline_id, response.json())
+                        final = state["state"] in TERMINAL_RUN_STATES
+                        previous = self.last.get("state") if self.last else None
+                        if state["state"] != previous:
+                            self._publish({**state, "final": final})
+                        if final:
+                            return
+                await asyncio.sleep(settings.AIRFLOW_RUN_POLL_SECONDS)
+        finally:
+            self._watcher._forget(self)
+
+
+class PipelineRunWatcher:
+    """Um único poller por execução de DAG, compartilhado entre os clientes."""
+
+    def __init__(self):
+        self._pollers: dict[tuple[str, str], _RunPoller] = {}
+
+    async def events(self, pipeline_id: str, dag_run_id: str) -> AsyncIterator[str]:
+        """Gera os eventos SSE de estado da execução até o estado terminal."""
+        key = (pipeline_id, dag_run_id)
+        poller = self._pollers.get(key)
+        if poller is None:
+            poller = self._pollers[key] = _RunPoller(self, key)
+        queue = poller.subscribe()
+
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        queue.get(), timeout=settings.SSE_KEEPALIVE_SECONDS
+                    )
+                except TimeoutError:
+                    # Comentário SSE mantém a conexão viva em proxies
+                    yield ": keep-alive\n\n"
+                    continue
+
+                yield _sse("error" if "error" in message else "state", message)
+                if message.get("final"):
+                    return
+        finally:
+            poller.unsubscribe(queue)
+
+    def _forget(self, poller: _RunPoller) -> None:
+        if self._pollers.get(poller.key) is poller:
+            del self._pollers[poller.key]
+
+    def active(self) -> int:
+        return len(self._pollers)
+
+
+run_watcher = PipelineRunWatcher()
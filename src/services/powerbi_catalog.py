@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogSnapshot:
+    """Visão imutável do catálogo, com índices por relatório e por workspace."""
+
+    def __init__(
+        self,
+        workspaces: list[dict],
+        reports: dict[str, list[dict]],
+        errors: list[dict],
+        version: int = 0,
+    ):
+        self.workspaces = workspaces
+        self.by_workspace = reports
+        self.errors = errors
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.dashboards = [
+            dashboard
+            for workspace in workspaces
+            for dashboard in reports.get(workspace["id"], [])
+        ]
+        self.by_id = {dashboard["id"]: dashboard for dashboard in self.dashboards}
+
+    def same_content(self, other: "CatalogSnapshot") -> bool:
+        return (
+            self.workspaces == other.workspaces
+            and self.by_workspace == other.by_workspace
+        )
+
+
+class PowerBICatalog:
+    """
+    Cache em memória de workspaces e relatórios do Power BI.
+
+    Depois da primeira carga, leituras nunca esperam pelo Power BI: quando o
+    TTL expira o catálogo atual continua sendo servido enquanto uma única
+    atualização roda em segundo plano.
+
+    As atualizações são incrementais: o loader recebe o catálogo anterior e
+    o instante da última sincronização e só precisa devolver os relatórios
+    dos workspaces alterados. Workspaces ausentes do resultado mantêm os
+    relatórios anteriores. A cada `full_sync_interval` segundos (ou após
+    `invalidate`) é feita uma carga completa.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[CatalogSnapshot | None, datetime | None], Awaitable[dict]],
+        ttl: float,
+        full_sync_interval: float = 86400,
+    ):
+        self.loader = loader
+        self.ttl = ttl
+        self.full_sync_interval = full_sync_interval
+        self._snapshot: CatalogSnapshot | None = None
+        self._stale = False
+        self._force_full_sync = False
+        self._synced_at: datetime | None = None
+        self._full_synced_at = 0.0
+        self._refresh_task: asyncio.Task | None = None
+        self._inflight = SingleFlight()
+
+    async def get(self) -> CatalogSnapshot:
+        """Retorna o catálogo atual, agendando atualização se estiver vencido."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return await self.refresh()
+
+        if self._stale or time.monotonic() - snapshot.loaded_at > self.ttl:
+            self._schedule_refresh()
+        return snapshot
+
+    async def refresh(self) -> CatalogSnapshot:
+        """Atualiza o catálogo (chamadas simultâneas compartilham a carga)."""
+        return await self._inflight.do_async("refresh", self._refresh)
+
+    def invalidate(self) -> None:
+        """Marca o catálogo como vencido e dispara uma carga completa."""
+        self._stale = True
+        self._force_full_sync = True
+        self._schedule_refresh()
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._background_refresh())
+
+    async def _background_refresh(self) -> None:
+        try:
+            await self.refresh()
+        except Exception:
+            logger.exception("Falha ao atualizar o catálogo do Power BI")
+
+    async def _refresh(self) -> CatalogSnapshot:
+        self._stale = False
+        previous = self._snapshot
+        full_sync = (
+            previous is None
+            or self._force_full_sync
+            or time.monotonic() - self._full_synced_at > self.full_sync_interval
+        )
+        self._force_full_sync = False
+
+        # Marca o início da sincronização para não perder alterações feitas
+        # durante a carga
+        started_at = datetime.now(timezone.utc)
+        result = await self.loader(
+            None if full_sync else previous, None if full_sync else self._synced_at
+        )
+
+        if result["workspaces"] is None:
+            # Sem a lista de workspaces: mantém o catálogo anterior, se houver
+            if previous is not None:
+                return previous
+            return CatalogSnapshot([], {}, result["errors"])
+
+        reports = {}
+        for workspace in result["workspaces"]:
+            workspace_id = workspace["id"]
+            if workspace_id in result["reports"]:
+                reports[workspace_id] = result["reports"][workspace_id]
+            elif previous is not None and workspace_id in previous.by_workspace:
+                # Workspace inalterado (ou com falha): mantém os relatórios anteriores
+                reports[workspace_id] = previous.by_workspace[workspace_id]
+
+        snapshot = CatalogSnapshot(result["workspaces"], reports, result["errors"])
+        if previous is None:
+            snapshot.version = 1
+        elif snapshot.same_content(previous):
+            snapshot.version = previous.version
+        else:
+            snapshot.version = previous.version + 1
+
+        self._snapshot = snapshot
+        self._synced_at = started_at
+        if full_sync:
+            self._full_synced_at = time.monotonic()
+        return snapshot
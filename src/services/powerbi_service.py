@@ -1,71 +1,398 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+import httpx
 import msal
-import requests
+from clients.powerbi import powerbi
 from config import settings
+from services.powerbi_catalog import CatalogSnapshot, PowerBICatalog
+from utils.singleflight import SingleFlight
+
+POWERBI_SCOPES = ["https://analysis.windows.net/powerbi/api/.default"]
+
+# Margem de segurança para não usar um token prestes a expirar
+TOKEN_EXPIRY_SKEW_SECONDS = 60
+
+# Quantidade de ids por filtro OData na busca de workspaces alterados
+ADMIN_FILTER_CHUNK_SIZE = 50
+
+logger = logging.getLogger(__name__)
+
+_inflight = SingleFlight()
+
+
+class _TokenProvider:
+    """Aplicação MSAL e último token do Azure, compartilhados pelo processo."""
+
+    def __init__(self):
+        self.app: msal.ConfidentialClientApplication | None = None
+        self.access_token: str | None = None
+        self.expires_at: float = 0.0
+
+    def get_app(self) -> msal.ConfidentialClientApplication:
+        if self.app is None:
+            self.app = msal.ConfidentialClientApplication(
+                client_id=settings.AZURE_CLIENT_ID,
+                authority=f"https://login.microsoftonline.com/{settings.AZURE_TENANT_ID}",
+                client_credential=settings.AZURE_CLIENT_SECRET,
+            )
+        return self.app
+
+    def is_valid(self) -> bool:
+        return (
+            self.access_token is not None
+            and self.expires_at - TOKEN_EXPIRY_SKEW_SECONDS > time.time()
+        )
+
+
+_tokens = _TokenProvider()
+
+
+class _AdminApiError(Exception):
+    """Falha transitória da API admin (throttling, 5xx), sem fallback."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Power BI admin API returned {status_code}")
+        self.status_code = status_code
+
+
+class _AdminApiState:
+    """Disponibilidade das APIs admin do Power BI para o service principal."""
+
+    def __init__(self):
+        self.retry_at: float = 0.0
+
+    def is_available(self) -> bool:
+        return time.monotonic() >= self.retry_at
+
+    def mark_unavailable(self) -> None:
+        self.retry_at = time.monotonic() + settings.POWERBI_ADMIN_RETRY_SECONDS
+
+
+_admin_api = _AdminApiState()
 
 
 class PowerBIService:
     @staticmethod
-    def acquire_bearer_token() -> str | None:
+    async def acquire_bearer_token() -> str | None:
         """Adquire token de acesso do Azure para Power BI."""
-        app_msal = msal.ConfidentialClientApplication(
-            client_id=settings.AZURE_CLIENT_ID,
-            authority=f"https://login.microsoftonline.com/{settings.AZURE_TENANT_ID}",
-            client_credential=settings.AZURE_CLIENT_SECRET,
-        )
+        if _tokens.is_valid():
+            return _tokens.access_token
+
+        return await _inflight.do_async("token", PowerBIService._request_token)
 
-        token_result = app_msal.acquire_token_for_client(
-            scopes=["https://analysis.windows.net/powerbi/api/.default"]
+    @staticmethod
+    async def _request_token(force_refresh: bool = False) -> str | None:
+        """Pede o token ao MSAL, que reaproveita seu cache em memória."""
+        app_msal = _tokens.get_app()
+        if force_refresh:
+            app_msal.remove_tokens_for_client()
+
+        # O MSAL é síncrono; roda fora do event loop
+        token_result = await asyncio.to_thread(
+            app_msal.acquire_token_for_client, scopes=POWERBI_SCOPES
         )
 
         if not token_result:
             return None
 
         if "access_token" in token_result:
+            _tokens.access_token = token_result["access_token"]
+            _tokens.expires_at = time.time() + int(token_result.get("expires_in", 0))
             return token_result["access_token"]
 
     @staticmethod
-    def get_dashboards() -> dict:
+    async def keep_token_fresh() -> None:
+        """
+        Renova o token em segundo plano alguns minutos antes da expiração,
+        para que nenhuma requisição espere pelo login no Azure AD.
+        """
+        while True:
+            if _tokens.access_token is not None:
+                refresh_at = _tokens.expires_at - settings.POWERBI_TOKEN_REFRESH_MARGIN
+                await asyncio.sleep(
+                    max(refresh_at - time.time(), settings.POWERBI_TOKEN_RETRY_SECONDS)
+                )
+
+            try:
+                token = await _inflight.do_async(
+                    "token", PowerBIService._request_token, True
+                )
+            except Exception:
+                logger.exception("Falha ao renovar o token do Power BI")
+                token = None
+
+            if token is None:
+                await asyncio.sleep(settings.POWERBI_TOKEN_RETRY_SECONDS)
+
+    @staticmethod
+    async def get_dashboards() -> dict:
         """Retorna lista de dashboards do Power BI."""
-        token = PowerBIService.acquire_bearer_token()
-        groups = requests.get(
-            "https://api.powerbi.com/v1.0/myorg/groups",
-            headers={"Authorization": f"Bearer {token}"},
-            verify=False,
+        snapshot = await catalog.get()
+        return {
+            "dashboards": snapshot.dashboards,
+            "errors": snapshot.errors,
+            "version": snapshot.version,
+        }
+
+    @staticmethod
+    async def get_catalog() -> CatalogSnapshot:
+        """Retorna o catálogo em memória com índices por relatório e workspace."""
+        return await catalog.get()
+
+    @staticmethod
+    def invalidate_catalog() -> None:
+        """Descarta o catálogo em memória e agenda uma nova carga."""
+        catalog.invalidate()
+
+    @staticmethod
+    async def _load_catalog(
+        previous: CatalogSnapshot | None = None, since: datetime | None = None
+    ) -> dict:
+        """
+        Carrega workspaces e relatórios do Power BI para o catálogo.
+
+        Com um catálogo anterior e a data da última sincronização, a API admin
+        é consultada só pelos workspaces alterados desde então. Sem a API
+        admin, todos os workspaces são relidos e o catálogo compara o
+        resultado com o anterior.
+        """
+        token = await PowerBIService.acquire_bearer_token()
+        headers = {"Authorization": f"Bearer {token}"}
+
+        if settings.POWERBI_USE_ADMIN_API and _admin_api.is_available():
+            try:
+                if previous is not None and since is not None:
+                    result = await PowerBIService._load_modified_workspaces(
+                        headers, previous, since
+                    )
+                else:
+                    result = await PowerBIService._load_catalog_from_admin_api(
+                        headers
+                    )
+            except _AdminApiError as exc:
+                # A listagem por workspace só vê os workspaces do service
+                # principal: em falha transitória mantém o catálogo anterior
+                return {
+                    "workspaces": None,
+                    "reports": {},
+                    "errors": [
+                        {
+                            "error": "Failed to retrieve workspaces from admin API",
+                            "status_code": exc.status_code,
+                        }
+                    ],
+                }
+            if result is not None:
+                return result
+
+        return await PowerBIService._load_catalog_by_workspace(headers)
+
+    @staticmethod
+    async def _load_catalog_from_admin_api(headers: dict) -> dict | None:
+        """
+        Carrega o catálogo em poucas chamadas via admin/groups?$expand=reports.
+        Retorna None quando a API admin é negada (401/403/404) e levanta
+        `_AdminApiError` nas demais falhas.
+        """
+        result = await PowerBIService._fetch_admin_groups(headers, "state eq 'Active'")
+        if result is None:
+            return None
+
+        workspaces, reports = result
+        return {"workspaces": workspaces, "reports": reports, "errors": []}
+
+    @staticmethod
+    async def _load_modified_workspaces(
+        headers: dict, previous: CatalogSnapshot, since: datetime
+    ) -> dict | None:
+        """
+        Relê apenas os workspaces alterados desde `since`, segundo
+        admin/workspaces/modified. Retorna None quando a API admin é negada
+        e levanta `_AdminApiError` nas demais falhas.
+        """
+        response = await powerbi.get(
+            "/admin/workspaces/modified",
+            headers=headers,
+            params={
+                "modifiedSince": since.isoformat(timespec="milliseconds").replace(
+                    "+00:00", "Z"
+                ),
+                # Mesmo escopo da carga completa, que inclui workspaces pessoais
+                "excludePersonalWorkspaces": "false",
+            },
         )
+        if response.status_code in (401, 403, 404):
+            _admin_api.mark_unavailable()
+            return None
+        if response.status_code != 200:
+            raise _AdminApiError(response.status_code)
 
-        dashboards = []
-        if groups.status_code == 200:
-            for group in groups.json().get("value", []):
-                dashboards_response = requests.get(
-                    f"https://api.powerbi.com/v1.0/myorg/groups/{group['id']}/reports",
-                    headers={"Authorization": f"Bearer {token}"},
-                    verify=False,
+        changed = {item.get("id") for item in response.json()}
+        if not changed:
+            return {"workspaces": previous.workspaces, "reports": {}, "errors": []}
+
+        updated = {}
+        reports = {}
+        ids = sorted(changed)
+        for start in range(0, len(ids), ADMIN_FILTER_CHUNK_SIZE):
+            chunk = ids[start : start + ADMIN_FILTER_CHUNK_SIZE]
+            ids_filter = " or ".join(f"id eq '{group_id}'" for group_id in chunk)
+            result = await PowerBIService._fetch_admin_groups(
+                headers, f"state eq 'Active' and ({ids_filter})"
+            )
+            if result is None:
+                return None
+
+            workspaces, chunk_reports = result
+            updated.update((workspace["id"], workspace) for workspace in workspaces)
+            reports.update(chunk_reports)
+
+        # Workspaces alterados que não voltaram foram removidos ou desativados
+        workspaces = [
+            updated.get(workspace["id"], workspace)
+            for workspace in previous.workspaces
+            if workspace["id"] not in changed or workspace["id"] in updated
+        ]
+        known = {workspace["id"] for workspace in previous.workspaces}
+        workspaces.extend(
+            workspace for workspace in updated.values() if workspace["id"] not in known
+        )
+
+        return {"workspaces": workspaces, "reports": reports, "errors": []}
+
+    @staticmethod
+    async def _fetch_admin_groups(
+        headers: dict, odata_filter: str
+    ) -> tuple[list[dict], dict[str, list[dict]]] | None:
+        """Pagina admin/groups com $expand=reports aplicando o filtro OData."""
+        page_size = settings.POWERBI_ADMIN_PAGE_SIZE
+        workspaces = []
+        reports = {}
+        skip = 0
+        while True:
+            response = await powerbi.get(
+                "/admin/groups",
+                headers=headers,
+                params={
+                    "$expand": "reports",
+                    "$filter": odata_filter,
+                    "$top": page_size,
+                    "$skip": skip,
+                },
+            )
+
+            if response.status_code in (401, 403, 404):
+                # Sem permissão de admin: evita novas tentativas por um tempo
+                _admin_api.mark_unavailable()
+                return None
+            if response.status_code != 200:
+                raise _AdminApiError(response.status_code)
+
+            page = response.json().get("value", [])
+            for group in page:
+                workspace = {"id": group.get("id"), "name": group.get("name")}
+                workspaces.append(workspace)
+                reports[workspace["id"]] = [
+                    PowerBIService._to_dashboard(report, workspace)
+                    for report in group.get("reports", [])
+                ]
+
+            if len(page) < page_size:
+                return workspaces, reports
+            skip += page_size
+
+    @staticmethod
+    async def _load_catalog_by_workspace(headers: dict) -> dict:
+        """Carrega o catálogo listando os relatórios de cada workspace."""
+        groups = await powerbi.get("/groups", headers=headers)
+
+        if groups.status_code != 200:
+            return {
+                "workspaces": None,
+                "reports": {},
+                "errors": [
+                    {
+                        "error": "Failed to retrieve workspaces",
+                        "status_code": groups.status_code,
+                    }
+                ],
+            }
+
+        workspaces = [
+            {"id": group.get("id"), "name": group.get("name")}
+            for group in groups.json().get("value", [])
+        ]
+
+        # Busca os relatórios dos workspaces em paralelo, com limite de concorrência
+        semaphore = asyncio.Semaphore(settings.POWERBI_MAX_CONCURRENCY)
+        results = await asyncio.gather(
+            *(
+                PowerBIService._fetch_workspace_dashboards(group, headers, semaphore)
+                for group in workspaces
+            )
+        )
+
+        reports = {}
+        errors = []
+        for group, (workspace_dashboards, error) in zip(workspaces, results):
+            if error is not None:
+                errors.append(error)
+            else:
+                reports[group["id"]] = workspace_dashboards
+
+        return {"workspaces": workspaces, "reports": reports, "errors": errors}
+
+    @staticmethod
+    async def _fetch_workspace_dashboards(
+        group: dict, headers: dict, semaphore: asyncio.Semaphore
+    ) -> tuple[list[dict], dict | None]:
+        """Retorna os dashboards de um workspace e o erro, se houver."""
+        try:
+            async with semaphore:
+                response = await powerbi.get(
+                    f"/groups/{group['id']}/reports", headers=headers
                 )
-                if dashboards_response.status_code == 200:
-                    for report in dashboards_response.json().get("value", []):
-                        dashboards.append(
-                            {
-                                "id": report.get("id"),
-                                "name": report.get("name"),
-                                "datasetId": report.get("datasetId"),
-                                "description": report.get("description"),
-                                "groupId": group.get("id"),
-                                "groupName": group.get("name"),
-                            }
-                        )
-                else:
-                    return {"error": "Failed to retrieve dashboards"}
+        except httpx.HTTPError as e:
+            return [], {
+                "groupId": group.get("id"),
+                "groupName": group.get("name"),
+                "error": str(e),
+            }
+
+        if response.status_code != 200:
+            return [], {
+                "groupId": group.get("id"),
+                "groupName": group.get("name"),
+                "error": "Failed to retrieve dashboards",
+                "status_code": response.status_code,
+            }
 
-        return {"dashboards": dashboards}
+        return [
+            PowerBIService._to_dashboard(report, group)
+            for report in response.json().get("value", [])
+        ], None
 
     @staticmethod
-    def get_groups() -> dict:
+    def _to_dashboard(report: dict, group: dict) -> dict:
+        """Converte um relatório do Power BI no formato de dashboard da API."""
+        return {
+            "id": report.get("id"),
+            "name": report.get("name"),
+            "datasetId": report.get("datasetId"),
+            "description": report.get("description"),
+            "groupId": group.get("id"),
+            "groupName": group.get("name"),
+        }
+
+    @staticmethod
+    async def get_groups() -> dict:
         """Retorna lista de grupos do Power BI."""
-        token = PowerBIService.acquire_bearer_token()
-        groups = requests.get(
-            "https://api.powerbi.com/v1.0/myorg/groups",
+        token = await PowerBIService.acquire_bearer_token()
+        groups = await powerbi.get(
+            "/groups",
             headers={"Authorization": f"Bearer {token}"},
-            verify=False,
         )
 
         if groups.status_code == 200:
@@ -74,13 +401,12 @@ class PowerBIService:
             return {"error": "Failed to retrieve groups"}
 
     @staticmethod
-    def get_reports(group_id: str) -> dict:
+    async def get_reports(group_id: str) -> dict:
         """Retorna lista de relatórios em um grupo específico do Power BI."""
-        token = PowerBIService.acquire_bearer_token()
-        reports = requests.get(
-            f"https://api.powerbi.com/v1.0/myorg/groups/{group_id}/reports",
+        token = await PowerBIService.acquire_bearer_token()
+        reports = await powerbi.get(
+            f"/groups/{group_id}/reports",
             headers={"Authorization": f"Bearer {token}"},
-            verify=False,
         )
 
         if reports.status_code == 200:
@@ -89,31 +415,28 @@ class PowerBIService:
             return {"error": "Failed to retrieve reports"}
 
     @staticmethod
-    def get_report(group_id: str, report_id: str) -> dict:
+    async def get_report(group_id: str, report_id: str) -> dict:
         """Retorna um relatório específico de um grupo do Power BI."""
-        token = PowerBIService.acquire_bearer_token()
-        report = requests.get(
-            f"https://api.powerbi.com/v1.0/myorg/groups/{group_id}/reports/{report_id}",
+        token = await PowerBIService.acquire_bearer_token()
+        report = await powerbi.get(
+            f"/groups/{group_id}/reports/{report_id}",
             headers={"Authorization": f"Bearer {token}"},
-            verify=False,
         )
 
         return report.json()
 
     @staticmethod
-    def delete_report(group_id: str, report_id: str, dataset_id: str) -> dict:
+    async def delete_report(group_id: str, report_id: str, dataset_id: str) -> dict:
         """Deleta um relatório específico de um grupo do Power BI."""
-        token = PowerBIService.acquire_bearer_token()
-        report = requests.delete(
-            f"https://api.powerbi.com/v1.0/myorg/groups/{group_id}/reports/{report_id}",
+        token = await PowerBIService.acquire_bearer_token()
+        report = await powerbi.delete(
+            f"/groups/{group_id}/reports/{report_id}",
             headers={"Authorization": f"Bearer {token}"},
-            verify=False,
         )
 
-        dataset = requests.delete(
-            f"https://api.powerbi.com/v1.0/myorg/groups/{group_id}/datasets/{dataset_id}",
+        dataset = await powerbi.delete(
+            f"/groups/{group_id}/datasets/{dataset_id}",
             headers={"Authorization": f"Bearer {token}"},
-            verify=False,
         )
 
         if dataset.status_code != 200:
@@ -123,3 +446,10 @@ class PowerBIService:
             return {"message": "Report deleted successfully"}
         else:
             return {"error": "Failed to delete report"}
+
+
+catalog = PowerBICatalog(
+    loader=PowerBIService._load_catalog,
+    ttl=settings.POWERBI_CATALOG_TTL,
+    full_sync_interval=settings.POWERBI_CATALOG_FULL_SYNC_SECONDS,
+)
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from config import settings
+from services.airflow_service import AirflowService
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class RefreshJobQueue:
+    """
+    Fila de refresh de pipelines drenada por um número limitado de workers.
+
+    Cada job guarda seu status (`queued`, `running`, `succeeded`, `failed`)
+    por `REFRESH_JOB_RETENTION_SECONDS`. Jobs da mesma DAG rodam um de cada
+    vez, em sequência pelo worker que a ocupa; os demais workers ficam livres
+    para outras DAGs.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue[str] | None = None
+        self._jobs = TTLCache(
+            maxsize=settings.REFRESH_JOB_MAX_JOBS,
+            ttl=settings.REFRESH_JOB_RETENTION_SECONDS,
+        )
+        # Jobs aguardando por DAG; a chave existe enquanto a DAG está ocupada
+        self._pending: dict[str, deque[dict]] = {}
+
+    @property
+    def queue(self) -> asyncio.Queue[str]:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=settings.REFRESH_QUEUE_SIZE)
+        return self._queue
+
+    def start(self) -> list[asyncio.Task]:
+        """Inicia os workers; as tasks devem ser canceladas no shutdown."""
+        return [
+            asyncio.create_task(self._worker())
+            for _ in range(settings.REFRESH_QUEUE_WORKERS)
+        ]
+
+    def submit(
+        self, dashboard_id: str | None = None, pipeline_id: str | None = None
+    ) -> dict:
+        """Enfileira o refresh da pipeline (ou da pipeline do dashboard)."""
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "dashboard_id": dashboard_id,
+            "pipeline_id": pipeline_id,
+            "result": None,
+            "error": None,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        try:
+            self.queue.put_nowait(job["id"])
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Refresh queue is full")
+
+        self._jobs.set(job["id"], job)
+        return job
+
+    def get(self, job_id: str) -> dict | None:
+        return self._jobs.get(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self.queue.get()
+            parked = False
+            try:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    parked = await self._dispatch(job)
+            except Exception:
+                logger.exception("Falha inesperada no job de refresh %s", job_id)
+            finally:
+                # Job estacionado só conta como concluído quando rodar
+                if not parked:
+                    self.queue.task_done()
+
+    async def _dispatch(self, job: dict) -> bool:
+        """
+        Roda o job e os que chegarem para a mesma DAG enquanto ele roda.
+        Se a DAG já está ocupada, estaciona o job e libera o worker
+        (retorna True).
+        """
+        try:
+            await self._resolve_pipeline(job)
+        except HTTPException as e:
+            self._fail(job, e.status_code, e.detail)
+            return False
+        except Exception as e:
+            logger.exception("Falha no job de refresh %s", job["id"])
+            self._fail(job, 500, str(e))
+            return False
+
+        pipeline_id = job["pipeline_id"]
+        pending = self._pending.get(pipeline_id)
+        if pending is not None:
+            pending.append(job)
+            return True
+
+        pending = self._pending[pipeline_id] = deque()
+        try:
+            await self._run(job)
+            while pending:
+                try:
+                    await self._run(pending.popleft())
+                finally:
+                    self.queue.task_done()
+        finally:
+            del self._pending[pipeline_id]
+            # Só sobra algo aqui se o worker foi cancelado
+            for _ in pending:
+                self.queue.task_done()
+        return False
+
+    @staticmethod
+    async def _resolve_pipeline(job: dict) -> None:
+        if job["pipeline_id"] is not None:
+            return
+
+        association = await AirflowService.get_dashboard_pipeline_association(
+            job["dashboard_id"]
+        )
+        if not association or "pipeline_id" not in association:
+            raise HTTPException(
+                status_code=404,
+                detail="No pipeline associated with this dashboard",
+            )
+        job["pipeline_id"] = association["pipeline_id"]
+
+    async def _run(self, job: dict) -> None:
+        job["status"] = "running"
+        job["started_at"] = _now()
+        try:
+            job["result"] = await AirflowService.refresh_pipeline(job["pipeline_id"])
+            job["status"] = "succeeded"
+            job["finished_at"] = _now()
+        except HTTPException as e:
+            self._fail(job, e.status_code, e.detail)
+        except Exception as e:
+            logger.exception("Falha no job de refresh %s", job["id"])
+            self._fail(job, 500, str(e))
+
+    @staticmethod
+    def _fail(job: dict, status_code: int, detail) -> None:
+        job["status"] = "failed"
+        job["error"] = {"status_code": status_code, "detail": detail}
+        job["finished_at"] = _now()
+
+
+refresh_jobs = RefreshJobQueue()
@@ -1,41 +1,31 @@
-import requests
+import asyncio
+import base64
+import json
+from fastapi import HTTPException
+from clients.pocketbase import pocketbase, quote
 from config import settings
+from services.access_replica import access_replica
 
 
 class UserService:
     @staticmethod
-    def get_user(user_id: str) -> dict:
+    async def get_user(user_id: str) -> dict:
         """Retorna os dados de um usuário específico."""
-        user = requests.get(
-            settings.POCKETBASE_URL + f"/api/collections/auth_users/records/{user_id}",
-            headers={"Content-Type": "application/json"},
-            verify=False,
-        ).json()
-        return user
+        response = await pocketbase.get(
+            f"/api/collections/auth_users/records/{user_id}",
+        )
+        return response.json()
 
     @staticmethod
-    def get_users(page: int = 1, per_page: int = 30) -> dict:
+    async def get_users(page: int = 1, per_page: int = 30) -> dict:
         """Retorna lista paginada de usuários."""
-        users = requests.get(
-            settings.POCKETBASE_URL
-            + f"/api/collections/auth_users/records?page={page}&perPage={per_page}",
-            headers={"Content-Type": "application/json"},
-            verify=False,
-        ).json()
-
-        result = []
-        for user in users["items"]:
-            result.append(
-                {
-                    "id": user.get("id", ""),
-                    "username": user.get("username", ""),
-                    "email": user.get("email", ""),
-                    "role": user.get("role", ""),
-                    "active": user.get("active", False),
-                    "created": user.get("created", ""),
-                    "updated": user.get("updated", ""),
-                }
-            )
+        response = await pocketbase.get(
+            "/api/collections/auth_users/records",
+            params={"page": page, "perPage": per_page},
+        )
+        users = response.json()
+
+        result = [UserService._to_user(user) for user in users["items"]]
 
         return {
             "page": users["page"],
@@ -46,16 +36,113 @@ class UserService:
         }
 
     @staticmethod
-    def create_user(
+    async def get_users_after(
+        cursor: str | None, per_page: int = 30, include_total: bool = False
+    ) -> dict:
+        """
+        Retorna uma página de usuários ordenada por (created, id), a partir
+        do cursor opaco devolvido pela página anterior. O total só é contado
+        quando pedido.
+        """
+        # Pede um registro a mais para saber se há próxima página; acima do
+        # limite do PocketBase ele cortaria a resposta e a paginação pararia
+        max_per_page = settings.POCKETBASE_MAX_PER_PAGE - 1
+        if not 1 <= per_page <= max_per_page:
+            raise HTTPException(
+                status_code=400,
+                detail=f"perPage must be between 1 and {max_per_page}",
+            )
+
+        params = {"sort": "created,id", "perPage": per_page + 1, "skipTotal": 1}
+        if cursor:
+            created, user_id = UserService._decode_cursor(cursor)
+            params["filter"] = (
+                f"(created>{quote(created)} || "
+                f"(created={quote(created)} && id>{quote(user_id)}))"
+            )
+
+        calls = [pocketbase.get("/api/collections/auth_users/records", params=params)]
+        if include_total:
+            calls.append(
+                pocketbase.get(
+                    "/api/collections/auth_users/records",
+                    params={"perPage": 1, "fields": "id"},
+                )
+            )
+        responses = await asyncio.gather(*calls)
+
+        items = responses[0].json()["items"]
+        page_items = items[:per_page]
+        next_cursor = None
+        if len(items) > per_page:
+            last = page_items[-1]
+            next_cursor = UserService._encode_cursor(last["created"], last["id"])
+
+        result = {
+            "perPage": per_page,
+            "users": [UserService._to_user(user) for user in page_items],
+            "next_cursor": next_cursor,
+        }
+        if include_total:
+            result["totalItems"] = responses[1].json()["totalItems"]
+        return result
+
+    @staticmethod
+    def _encode_cursor(created: str, user_id: str) -> str:
+        payload = json.dumps([created, user_id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[str, str]:
+        try:
+            payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            created, user_id = json.loads(payload)
+            if not isinstance(created, str) or not isinstance(user_id, str):
+                raise ValueError(cursor)
+            return created, user_id
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    @staticmethod
+    async def get_users_by_ids(user_ids: list[str]) -> dict:
+        """Retorna os usuários indexados por id, em consultas filtradas em lote."""
+        user_ids = list(dict.fromkeys(filter(None, map(str.strip, user_ids))))
+        if len(user_ids) > settings.USER_BATCH_MAX_IDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {settings.USER_BATCH_MAX_IDS} ids per request",
+            )
+
+        records = await pocketbase.list_any("auth_users", "id", user_ids)
+        users = {record["id"]: UserService._to_user(record) for record in records}
+
+        return {
+            "users": users,
+            "missing": [user_id for user_id in user_ids if user_id not in users],
+        }
+
+    @staticmethod
+    def _to_user(user: dict) -> dict:
+        return {
+            "id": user.get("id", ""),
+            "username": user.get("username", ""),
+            "email": user.get("email", ""),
+            "role": user.get("role", ""),
+            "active": user.get("active", False),
+            "created": user.get("created", ""),
+            "updated": user.get("updated", ""),
+        }
+
+    @staticmethod
+    async def create_user(
         username: str, email: str, password: str, password_confirm: str, role: str
     ) -> dict:
         """Cria um novo usuário."""
         if password != password_confirm:
             return {"error": "Password and password confirmation do not match"}
 
-        user = requests.post(
-            settings.POCKETBASE_URL + "/api/collections/auth_users/records",
-            headers={"Content-Type": "application/json"},
+        response = await pocketbase.post(
+            "/api/collections/auth_users/records",
             json={
                 "username": username,
                 "email": email,
@@ -65,30 +152,25 @@ class UserService:
                 "emailVisibility": True,
                 "verify": True,
             },
-            verify=False,
-        ).json()
+        )
 
-        return user
+        return response.json()
 
     @staticmethod
-    def update_user(user_id: str, update_data: dict) -> dict:
+    async def update_user(user_id: str, update_data: dict) -> dict:
         """Atualiza os dados de um usuário."""
-        user = requests.patch(
-            settings.POCKETBASE_URL + f"/api/collections/auth_users/records/{user_id}",
-            headers={"Content-Type": "application/json"},
+        response = await pocketbase.patch(
+            f"/api/collections/auth_users/records/{user_id}",
             json=update_data,
-            verify=False,
-        ).json()
+        )
 
-        return user
+        return response.json()
 
     @staticmethod
-    def delete_user(user_id: str) -> dict:
+    async def delete_user(user_id: str) -> dict:
         """Deleta um usuário."""
-        response = requests.delete(
-            settings.POCKETBASE_URL + f"/api/collections/auth_users/records/{user_id}",
-            headers={"Content-Type": "application/json"},
-            verify=False,
+        response = await pocketbase.delete(
+            f"/api/collections/auth_users/records/{user_id}",
         )
 
         if response.status_code == 204:
@@ -97,36 +179,47 @@ class UserService:
             return {"error": "Failed to delete user"}
 
     @staticmethod
-    def get_user_groups(user_id: str) -> dict:
+    async def get_user_group_ids(user_id: str) -> list[str]:
+        """Retorna os ids dos grupos do usuário numa única consulta paginada."""
+        user_groups = await UserService.get_user_groups(user_id)
+        return list(dict.fromkeys(group["id"] for group in user_groups["groups"]))
+
+    @staticmethod
+    async def get_user_groups(user_id: str) -> dict:
         """Retorna todos os grupos em que o usuário pertence."""
-        user_groups = requests.get(
-            settings.POCKETBASE_URL
-            + f"/api/collections/groups_users/records?filter=(user_id='{user_id}')",
-            headers={"Content-Type": "application/json"},
-            verify=False,
-        ).json()
+        if access_replica.ready:
+            groups = access_replica.groups()
+            user_groups = [
+                UserService._to_group(groups[membership["group_id"]])
+                for membership in access_replica.user_memberships(user_id)
+                if membership.get("group_id") in groups
+            ]
+            return {"groups": user_groups, "total": len(user_groups)}
+
+        # Vínculos com os grupos expandidos, em todas as páginas
+        memberships = await pocketbase.list_all(
+            "groups_users", filter=f"user_id={quote(user_id)}", expand="group_id"
+        )
 
         groups = []
-        for user_group in user_groups["items"]:
-            group_record = requests.get(
-                settings.POCKETBASE_URL
-                + f"/api/collections/groups/records/{user_group['group_id']}",
-                headers={"Content-Type": "application/json"},
-                verify=False,
-            ).json()
-
-            if "id" not in group_record:
+        for membership in memberships:
+            group_record = membership.get("expand", {}).get("group_id")
+
+            # Grupos já removidos não trazem o expand
+            if not group_record or "id" not in group_record:
                 continue
 
-            groups.append(
-                {
-                    "id": group_record["id"],
-                    "name": group_record.get("name", ""),
-                    "description": group_record.get("description", ""),
-                    "active": group_record.get("active", True),
-                    "created": group_record.get("created", ""),
-                    "updated": group_record.get("updated", ""),
-                }
-            )
+            groups.append(UserService._to_group(group_record))
 
         return {"groups": groups, "total": len(groups)}
+
+    @staticmethod
+    def _to_group(group_record: dict) -> dict:
+        return {
+            "id": group_record["id"],
+            "name": group_record.get("name", ""),
+            "description": group_record.get("description", ""),
+            "active": group_record.get("active", True),
+            "created": group_record.get("created", ""),
+            "updated": group_record.get("updated", ""),
+        }
@@ -0,0 +1,4 @@
+from .cache import TTLCache
+from .singleflight import SingleFlight
+
+__all__ = ["TTLCache", "SingleFlight"]
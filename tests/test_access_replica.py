@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from src.services.access_replica import AccessReplica
+
+COLLECTIONS = {
+    "groups": [{"id": "g1", "name": "Group 1"}],
+    "groups_users": [{"id": "m1", "group_id": "g1", "user_id": "u1"}],
+    "groups_dashboards": [{"id": "d1", "group_id": "g1", "dashboard_id": "dash1"}],
+    "pipelines_dashboards": [
+        {"id": "p1", "dashboard_id": "dash1", "pipeline_id": "dag1"}
+    ],
+}
+
+
+class TestAccessReplica:
+    @pytest.mark.asyncio
+    @patch("src.services.access_replica.pocketbase.list_all")
+    async def test_resync_builds_adjacency_maps(self, mock_list_all):
+        """Testa a carga completa das coleções nos mapas de adjacência."""
+        mock_list_all.side_effect = lambda name: COLLECTIONS[name]
+        replica = AccessReplica()
+        listener = Mock()
+        replica.add_listener(listener)
+
+        await replica.resync()
+
+        assert replica.ready
+        assert [m["group_id"] for m in replica.user_memberships("u1")] == ["g1"]
+        assert [m["user_id"] for m in replica.group_memberships("g1")] == ["u1"]
+        assert replica.group_dashboards("g1")[0]["dashboard_id"] == "dash1"
+        assert replica.dashboard_pipelines("dash1")[0]["pipeline_id"] == "dag1"
+        listener.assert_called_once_with(None, None, None)
+
+    def test_apply_update_moves_record_between_indexes(self):
+        """Testa que um update remove o registro do índice anterior."""
+        replica = AccessReplica()
+        listener = Mock()
+        replica.add_listener(listener)
+        old = {"id": "m1", "group_id": "g1", "user_id": "u1"}
+        new = {"id": "m1", "group_id": "g2", "user_id": "u1"}
+
+        replica.apply("groups_users", "create", old)
+        replica.apply("groups_users", "update", new)
+        replica.apply("groups_users", "delete", {"id": "missing"})
+
+        assert replica.group_memberships("g1") == []
+        assert replica.group_memberships("g2") == [new]
+        listener.assert_any_call("groups_users", old, new)
+
+    @pytest.mark.asyncio
+    @patch("src.services.access_replica.settings.ACCESS_REPLICA_RECONNECT_SECONDS", 0)
+    async def test_run_resyncs_after_reconnect(self):
+        """Testa a reconexão e nova carga completa quando o stream cai."""
+        replica = AccessReplica()
+        connections = 0
+
+        async def realtime(topics):
+            nonlocal connections
+            connections += 1
+            yield "PB_CONNECT", {"clientId": "c1"}
+            if connections == 1:
+                raise ConnectionError("stream closed")
+            yield "groups/*", {"action": "create", "record": {"id": "g9"}}
+            await asyncio.Event().wait()
+
+        with patch(
+            "src.services.access_replica.pocketbase.realtime", side_effect=realtime
+        ), patch.object(replica, "resync", AsyncMock()) as mock_resync:
+            task = asyncio.create_task(replica.run())
+            for _ in range(10):
+                await asyncio.sleep(0)
+            task.cancel()
+
+        assert connections == 2
+        assert mock_resync.await_count == 2
+        assert "g9" in replica.groups()
@@ -0,0 +1,88 @@
+import httpx
+import pytest
+from unittest.mock import patch
+from src.clients.airflow import AirflowClient, _basic
+
+
+def mock_client(client: AirflowClient, handler) -> None:
+    """Troca o transporte do cliente por um que responde via `handler`."""
+    client._client = httpx.AsyncClient(
+        base_url="http://airflow.local", transport=httpx.MockTransport(handler)
+    )
+
+
+class TestAirflowClient:
+    @pytest.mark.asyncio
+    @patch("src.clients.airflow.settings.AIRFLOW_USERNAME", "user")
+    @patch("src.clients.airflow.settings.AIRFLOW_PASSWORD", "secret")
+    async def test_auth_is_negotiated_once(self):
+        """Testa o fallback para credenciais em branco, negociado uma única vez."""
+        client = AirflowClient()
+        seen = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append((request.url.path, request.headers["Authorization"]))
+            if request.headers["Authorization"] != _basic("", ""):
+                return httpx.Response(401)
+            return httpx.Response(200, json={"dags": []})
+
+        mock_client(client, handler)
+
+        await client.get("/api/v1/dags")
+        await client.get("/api/v1/dags/dag1")
+
+        assert seen == [
+            ("/api/v1/dags", _basic("user", "secret")),
+            ("/api/v1/dags", _basic("", "")),
+            ("/api/v1/dags", _basic("", "")),
+            ("/api/v1/dags/dag1", _basic("", "")),
+        ]
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    @patch("src.clients.airflow.settings.AIRFLOW_USERNAME", "user")
+    @patch("src.clients.airflow.settings.AIRFLOW_PASSWORD", "secret")
+    async def test_unauthorized_renegotiates_and_retries(self):
+        """Testa que um 401 renegocia a autenticação e repete a requisição."""
+        client = AirflowClient()
+        accepted = {"value": _basic("user", "secret")}
+        posts = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.headers["Authorization"] != accepted["value"]:
+                return httpx.Response(401)
+            if request.method == "POST":
+                posts.append(request.headers["Authorization"])
+                return httpx.Response(200, json={"dag_run_id": "run1"})
+            return httpx.Response(200, json={"dags": []})
+
+        mock_client(client, handler)
+        await client.negotiate_auth()
+
+        # O servidor passa a aceitar apenas credenciais em branco
+        accepted["value"] = _basic("", "")
+        response = await client.post("/api/v1/dags/dag1/dagRuns", json={})
+
+        assert response.status_code == 200
+        assert posts == [_basic("", "")]
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_failed_negotiation_backs_off(self):
+        """Testa que sem credencial aceita a sondagem não se repete a cada chamada."""
+        client = AirflowClient()
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            return httpx.Response(401)
+
+        mock_client(client, handler)
+
+        for _ in range(3):
+            response = await client.get("/api/v1/dags/dag1")
+            assert response.status_code == 401
+
+        # 2 sondagens (configurada e em branco) + 3 requisições
+        assert len(calls) == 5
+        await client.aclose()
@@ -1,9 +1,34 @@
+import asyncio
 import pytest
 from unittest.mock import Mock, patch
+from src.services import airflow_service
 from src.services.airflow_service import AirflowService
 from fastapi import HTTPException
 
 
+@pytest.fixture(autouse=True)
+def reset_dag_listings(monkeypatch):
+    """Garante que cada teste liste as DAGs sem cache."""
+    monkeypatch.setattr(
+        airflow_service, "_dag_listings", airflow_service._DagListingCache()
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_refreshes():
+    """Garante que cada teste de refresh comece sem execuções em cache."""
+    airflow_service._active_runs.clear()
+    airflow_service._triggered_runs.clear()
+
+
+def no_active_runs() -> Mock:
+    """Resposta da consulta de execuções ativas sem nenhuma execução."""
+    response = Mock()
+    response.status_code = 200
+    response.json.return_value = {"dag_runs": [], "total_entries": 0}
+    return response
+
+
 class TestAirflowService:
     @patch("src.services.airflow_service.requests.post")
     def test_acquire_bearer_token_success(self, mock_post):
@@ -17,11 +42,11 @@ class TestAirflowService:
 
         assert result["access_token"] == "test_token"
 
-    @patch("src.services.airflow_service.AirflowService.acquire_bearer_token")
-    @patch("src.services.airflow_service.requests.get")
-    def test_get_pipelines_success(self, mock_get, mock_token):
+    @pytest.mark.asyncio
+    @patch("src.services.airflow_service.settings.AIRFLOW_URL", "http://airflow.local")
+    @patch("src.services.airflow_service.airflow.get")
+    async def test_get_pipelines_success(self, mock_get):
         """Testa obtenção de pipelines do Airflow."""
-        mock_token.return_value = {"access_token": "test_token"}
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.json.return_value = {
@@ -35,42 +60,147 @@ class TestAirflowService:
         }
         mock_get.return_value = mock_response
 
-        result = AirflowService.get_pipelines()
+        result = await AirflowService.get_pipelines()
 
         assert "dags" in result
         assert len(result["dags"]) == 1
         assert result["dags"][0]["id"] == "dag1"
 
-    @patch("src.services.airflow_service.AirflowService.acquire_bearer_token")
-    @patch("src.services.airflow_service.requests.post")
-    def test_refresh_pipeline_success(self, mock_post, mock_token):
+    @pytest.mark.asyncio
+    @patch("src.services.airflow_service.settings.AIRFLOW_PAGE_SIZE", 2)
+    @patch("src.services.airflow_service.settings.AIRFLOW_URL", "http://airflow.local")
+    @patch("src.services.airflow_service.airflow.get")
+    async def test_get_pipelines_fetches_all_pages(self, mock_get):
+        """Testa a paginação por limit/offset, os filtros e o cache da listagem."""
+        all_dags = [{"dag_id": f"dag{i}"} for i in range(5)]
+
+        def dag_page(endpoint, params, **kwargs):
+            assert params["dag_id_pattern"] == "sales"
+            offset = params["offset"]
+            mock_response = Mock()
+            mock_response.status_code = 200
+            mock_response.json.return_value = {
+                "dags": all_dags[offset : offset + params["limit"]],
+                "total_entries": len(all_dags),
+            }
+            return mock_response
+
+        mock_get.side_effect = dag_page
+
+        result = await AirflowService.get_pipelines(dag_id_pattern="sales")
+        cached = await AirflowService.get_pipelines(dag_id_pattern="sales")
+
+        assert [dag["id"] for dag in result["dags"]] == [f"dag{i}" for i in range(5)]
+        assert cached is result
+        assert mock_get.await_count == 3
+
+    @pytest.mark.asyncio
+    @patch("src.services.airflow_service.settings.AIRFLOW_URL", "http://airflow.local")
+    @patch("src.services.airflow_service.airflow.get")
+    @patch("src.services.airflow_service.airflow.post")
+    async def test_refresh_pipeline_success(self, mock_post, mock_get):
         """Testa execução de pipeline."""
-        mock_token.return_value = {"access_token": "test_token"}
         mock_response = Mock()
         mock_response.status_code = 200
+        mock_response.json.return_value = {"dag_run_id": "run1", "state": "queued"}
         mock_post.return_value = mock_response
+        mock_get.return_value = no_active_runs()
 
-        result = AirflowService.refresh_pipeline("dag123")
+        result = await AirflowService.refresh_pipeline("dag123")
 
         assert result["message"] == "Pipeline refreshed successfully"
 
-    @patch("src.services.airflow_service.AirflowService.acquire_bearer_token")
-    @patch("src.services.airflow_service.requests.post")
-    def test_refresh_pipeline_failure(self, mock_post, mock_token):
+    @pytest.mark.asyncio
+    @patch("src.services.airflow_service.settings.AIRFLOW_URL", "http://airflow.local")
+    @patch("src.services.airflow_service.airflow.get")
+    @patch("src.services.airflow_service.airflow.post")
+    async def test_refresh_pipeline_failure(self, mock_post, mock_get):
         """Testa falha na execução de pipeline."""
-        mock_token.return_value = {"access_token": "test_token"}
         mock_response = Mock()
         mock_response.status_code = 500
         mock_response.text = "Internal Server Error"
         mock_post.return_value = mock_response
+        mock_get.return_value = no_active_runs()
 
         with pytest.raises(HTTPException) as exc_info:
-            AirflowService.refresh_pipeline("dag123")
+            await AirflowService.refresh_pipeline("dag123")
 
         assert exc_info.value.status_code == 500
 
-    @patch("src.services.airflow_service.requests.get")
-    def test_get_all_pipeline_associations_success(self, mock_get):
+    @pytest.mark.asyncio
+    @patch("src.services.airflow_service.settings.AIRFLOW_URL", "http://airflow.local")
+    @patch("src.services.airflow_service.airflow.get")
+    @patch("src.services.airflow_service.airflow.post")
+    async def test_refresh_pipeline_returns_active_run(self, mock_post, mock_get):
+        """Testa que uma execução na fila ou rodando é reaproveitada."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "dag_runs": [{"dag_run_id": "run1", "state": "running"}],
+            "total_entries": 1,
+        }
+        mock_get.return_value = mock_response
+
+        result = await AirflowService.refresh_pipeline("dag123")
+        again = await AirflowService.refresh_pipeline("dag123")
+
+        assert result["already_running"] is True
+        assert result["dag_run_id"] == "run1"
+        assert again["dag_run_id"] == "run1"
+        assert mock_get.call_args.kwargs["params"]["state"] == ["queued", "running"]
+        mock_get.assert_awaited_once()
+        mock_post.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("src.services.airflow_service.settings.AIRFLOW_URL", "http://airflow.local")
+    @patch("src.services.airflow_service.airflow.get")
+    @patch("src.services.airflow_service.airflow.post")
+    async def test_refresh_pipeline_coalesces_triggers(self, mock_post, mock_get):
+        """Testa que refreshes simultâneos e no debounce disparam uma execução."""
+
+        async def trigger(path, json):
+            await asyncio.sleep(0)
+            mock_response = Mock()
+            mock_response.status_code = 200
+            mock_response.json.return_value = {
+                "dag_run_id": json["dag_run_id"],
+                "state": "queued",
+            }
+            return mock_response
+
+        mock_get.return_value = no_active_runs()
+        mock_post.side_effect = trigger
+
+        results = await asyncio.gather(
+            *(AirflowService.refresh_pipeline("dag123") for _ in range(5))
+        )
+        later = await AirflowService.refresh_pipeline("dag123")
+
+        mock_post.assert_awaited_once()
+        assert {r["dag_run_id"] for r in results} == {later["dag_run_id"]}
+        assert later["already_running"] is True
+
+    @pytest.mark.asyncio
+    @patch("src.services.airflow_service.settings.AIRFLOW_URL", "http://airflow.local")
+    @patch("src.services.airflow_service.airflow.get")
+    @patch("src.services.airflow_service.airflow.post")
+    async def test_refresh_pipeline_run_ids_are_unique(self, mock_post, mock_get):
+        """Testa ids de execução distintos para disparos no mesmo segundo."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"dag_run_id": "run", "state": "queued"}
+        mock_get.return_value = no_active_runs()
+        mock_post.return_value = mock_response
+
+        await AirflowService.refresh_pipeline("dag1")
+        await AirflowService.refresh_pipeline("dag2")
+
+        run_ids = [c.kwargs["json"]["dag_run_id"] for c in mock_post.call_args_list]
+        assert len(set(run_ids)) == 2
+
+    @pytest.mark.asyncio
+    @patch("src.services.airflow_service.pocketbase.get")
+    async def test_get_all_pipeline_associations_success(self, mock_get):
         """Testa obtenção de associações pipeline-dashboard."""
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -80,13 +210,14 @@ class TestAirflowService:
         }
         mock_get.return_value = mock_response
 
-        result = AirflowService.get_all_pipeline_associations()
+        result = await AirflowService.get_all_pipeline_associations()
 
         assert "items" in result
         assert len(result["items"]) == 1
 
-    @patch("src.services.airflow_service.requests.post")
-    def test_create_pipeline_association_success(self, mock_post):
+    @pytest.mark.asyncio
+    @patch("src.services.airflow_service.pocketbase.post")
+    async def test_create_pipeline_association_success(self, mock_post):
         """Testa criação de associação pipeline-dashboard."""
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -96,18 +227,37 @@ class TestAirflowService:
         }
         mock_post.return_value = mock_response
 
-        result = AirflowService.create_pipeline_association("dash1", "dag1")
+        result = await AirflowService.create_pipeline_association("dash1", "dag1")
 
         assert result["pipeline_id"] == "dag1"
         assert result["dashboard_id"] == "dash1"
 
-    @patch("src.services.airflow_service.requests.delete")
-    def test_delete_pipeline_association_success(self, mock_delete):
+    @pytest.mark.asyncio
+    @patch("src.services.airflow_service.pocketbase.get")
+    @patch("src.services.airflow_service.pocketbase.delete")
+    async def test_delete_pipeline_association_success(self, mock_delete, mock_get):
         """Testa exclusão de associação pipeline-dashboard."""
+        mock_search = Mock()
+        mock_search.json.return_value = {"items": [{"id": "assoc1"}]}
+        mock_get.return_value = mock_search
         mock_response = Mock()
         mock_response.status_code = 204
         mock_delete.return_value = mock_response
 
-        result = AirflowService.delete_pipeline_association("dash123")
+        result = await AirflowService.delete_pipeline_association("dash123")
 
         assert result["message"] == "Pipeline association removed successfully"
+
+    @pytest.mark.asyncio
+    @patch("src.services.airflow_service.pocketbase.get")
+    async def test_pipeline_association_lookups_escape_ids(self, mock_get):
+        """Testa o escape dos ids nos filtros das associações."""
+        mock_response = Mock()
+        mock_response.json.return_value = {"items": []}
+        mock_get.return_value = mock_response
+
+        await AirflowService.get_dashboard_pipeline_association("it's")
+        await AirflowService.get_pipeline_association("it's")
+
+        filters = [c.kwargs["params"]["filter"] for c in mock_get.call_args_list]
+        assert filters == ["dashboard_id='it\\'s'", "pipeline_id='it\\'s'"]
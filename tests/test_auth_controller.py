@@ -47,3 +47,16 @@ class TestAuthController:
 
         assert response.status_code == 200
         assert response.json()["message"] == "User registered"
+
+    @patch("src.middlewares.auth.AuthService.revoke_token")
+    @patch("src.middlewares.auth.AuthService.verify_token")
+    def test_logout_revokes_token(self, mock_verify, mock_revoke):
+        """Testa que o logout revoga o token."""
+        mock_verify.return_value = {"token": "test_token", "record": {"id": "123"}}
+
+        response = client.post(
+            "/user/logout", headers={"Authorization": "Bearer test_token"}
+        )
+
+        assert response.status_code == 200
+        mock_revoke.assert_called_once_with("test_token")
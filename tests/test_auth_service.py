@@ -1,37 +1,124 @@
+import asyncio
 import pytest
 from unittest.mock import Mock, patch
+from src.services import auth_service
 from src.services.auth_service import AuthService
 from fastapi import HTTPException
 
 
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    """Isola os testes dos caches de autenticação do módulo."""
+    auth_service._verified_tokens.clear()
+
+
 class TestAuthService:
-    @patch("src.services.auth_service.requests.post")
-    def test_verify_token_success(self, mock_post):
+    @pytest.mark.asyncio
+    @patch("src.services.auth_service.pocketbase.post")
+    async def test_verify_token_success(self, mock_post):
         """Testa verificação de token bem-sucedida."""
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.json.return_value = {"id": "123", "email": "test@test.com"}
         mock_post.return_value = mock_response
 
-        result = AuthService.verify_token("valid_token")
+        result = await AuthService.verify_token("valid_token")
 
         assert result["id"] == "123"
         assert result["email"] == "test@test.com"
 
-    @patch("src.services.auth_service.requests.post")
-    def test_verify_token_invalid(self, mock_post):
+    @pytest.mark.asyncio
+    @patch("src.services.auth_service.pocketbase.post")
+    async def test_verify_token_invalid(self, mock_post):
         """Testa verificação de token inválido."""
         mock_response = Mock()
         mock_response.status_code = 401
         mock_post.return_value = mock_response
 
         with pytest.raises(HTTPException) as exc_info:
-            AuthService.verify_token("invalid_token")
+            await AuthService.verify_token("invalid_token")
 
         assert exc_info.value.status_code == 401
 
-    @patch("src.services.auth_service.requests.post")
-    def test_login_success(self, mock_post):
+    @pytest.mark.asyncio
+    @patch("src.services.auth_service.pocketbase.post")
+    async def test_verify_token_cached(self, mock_post):
+        """Testa que o mesmo token é verificado uma única vez no PocketBase."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"token": "t", "record": {"id": "123"}}
+        mock_post.return_value = mock_response
+
+        await AuthService.verify_token("valid_token")
+        result = await AuthService.verify_token("valid_token")
+
+        assert result["record"]["id"] == "123"
+        mock_post.assert_called_once()
+        assert AuthService.cache_stats()["tokens"]["hits"] == 1
+
+    @pytest.mark.asyncio
+    @patch("src.services.auth_service.pocketbase.post")
+    async def test_verify_token_rejection_cached(self, mock_post):
+        """Testa o cache negativo de tokens recusados."""
+        mock_response = Mock()
+        mock_response.status_code = 401
+        mock_post.return_value = mock_response
+
+        for _ in range(3):
+            with pytest.raises(HTTPException) as exc_info:
+                await AuthService.verify_token("invalid_token")
+            assert exc_info.value.status_code == 401
+
+        mock_post.assert_called_once()
+
+    @pytest.mark.asyncio
+    @patch("src.services.auth_service.pocketbase.post")
+    async def test_revoke_token(self, mock_post):
+        """Testa que o token é recusado após o logout, sem nova consulta."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"token": "t", "record": {"id": "123"}}
+        mock_post.return_value = mock_response
+
+        await AuthService.verify_token("valid_token")
+        AuthService.revoke_token("valid_token")
+        with pytest.raises(HTTPException) as exc_info:
+            await AuthService.verify_token("valid_token")
+
+        assert exc_info.value.status_code == 401
+        assert mock_post.call_count == 1
+
+    @pytest.mark.asyncio
+    @patch("src.services.auth_service.pocketbase.post")
+    async def test_revoke_token_during_verification(self, mock_post):
+        """Testa que uma verificação em andamento não revalida o token revogado."""
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def refresh(*args, **kwargs):
+            started.set()
+            await release.wait()
+            mock_response = Mock()
+            mock_response.status_code = 200
+            mock_response.json.return_value = {"token": "t", "record": {"id": "1"}}
+            return mock_response
+
+        mock_post.side_effect = refresh
+
+        verification = asyncio.ensure_future(AuthService.verify_token("valid_token"))
+        await started.wait()
+        AuthService.revoke_token("valid_token")
+        release.set()
+
+        with pytest.raises(HTTPException):
+            await verification
+        with pytest.raises(HTTPException):
+            await AuthService.verify_token("valid_token")
+        assert mock_post.call_count == 1
+
+    @pytest.mark.asyncio
+    @patch("src.services.auth_service.pocketbase.post")
+    async def test_login_success(self, mock_post):
         """Testa login bem-sucedido."""
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -47,41 +134,44 @@ class TestAuthService:
         }
         mock_post.return_value = mock_response
 
-        result = AuthService.login("test@test.com", "password123")
+        result = await AuthService.login("test@test.com", "password123")
 
         assert result["token"] == "test_token"
         assert result["record"]["email"] == "test@test.com"
 
-    @patch("src.services.auth_service.requests.post")
-    def test_login_invalid_credentials(self, mock_post):
+    @pytest.mark.asyncio
+    @patch("src.services.auth_service.pocketbase.post")
+    async def test_login_invalid_credentials(self, mock_post):
         """Testa login com credenciais inválidas."""
         mock_response = Mock()
         mock_response.json.return_value = {"error": "Invalid credentials"}
         mock_post.return_value = mock_response
 
-        result = AuthService.login("test@test.com", "wrong_password")
+        result = await AuthService.login("test@test.com", "wrong_password")
 
         assert "error" in result
 
-    @patch("src.services.auth_service.requests.post")
-    def test_register_success(self, mock_post):
+    @pytest.mark.asyncio
+    @patch("src.services.auth_service.pocketbase.post")
+    async def test_register_success(self, mock_post):
         """Testa registro bem-sucedido."""
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.json.return_value = {"id": "123"}
         mock_post.return_value = mock_response
 
-        result = AuthService.register(
+        result = await AuthService.register(
             "testuser", "test@test.com", "password123", "password123", "user"
         )
 
         assert result["message"] == "User registered"
         assert result["user_id"] == "123"
 
-    def test_register_password_mismatch(self):
+    @pytest.mark.asyncio
+    async def test_register_password_mismatch(self):
         """Testa registro com senhas diferentes."""
         with pytest.raises(HTTPException) as exc_info:
-            AuthService.register(
+            await AuthService.register(
                 "testuser", "test@test.com", "password123", "different", "user"
             )
 
@@ -0,0 +1,41 @@
+from unittest.mock import patch
+from src.utils.cache import TTLCache
+
+
+class TestTTLCache:
+    def test_get_set(self):
+        """Testa leitura e escrita com contadores de acerto/falha."""
+        cache = TTLCache(maxsize=2, ttl=60)
+
+        assert cache.get("a") is None
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_evicts_least_recently_used(self):
+        """Testa o descarte da entrada menos usada quando o cache enche."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    @patch("src.utils.cache.time.monotonic")
+    def test_expires_entries(self, mock_monotonic):
+        """Testa a expiração por TTL, inclusive TTL por entrada."""
+        mock_monotonic.return_value = 100.0
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=5)
+
+        mock_monotonic.return_value = 110.0
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert len(cache) == 1
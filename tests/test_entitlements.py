@@ -0,0 +1,53 @@
+import pytest
+from unittest.mock import AsyncMock
+from src.services.entitlements import EntitlementCache
+
+
+class TestEntitlementCache:
+    @pytest.mark.asyncio
+    async def test_caches_dashboards_per_user(self):
+        """Testa que as permissões do usuário são calculadas uma única vez."""
+        loader = AsyncMock(return_value=(["g1"], {"dash1", "dash2"}))
+        entitlements = EntitlementCache(loader=loader, maxsize=10, ttl=300)
+
+        first = await entitlements.get("user1")
+        second = await entitlements.get("user1")
+
+        assert first == second == {"dash1", "dash2"}
+        loader.assert_awaited_once_with("user1")
+
+    @pytest.mark.asyncio
+    async def test_invalidate_group_only_drops_its_users(self):
+        """Testa a invalidação pelo índice reverso grupo → usuários."""
+        memberships = {"user1": ["g1"], "user2": ["g2"]}
+        loader = AsyncMock(
+            side_effect=lambda user_id: (memberships[user_id], {f"{user_id}-dash"})
+        )
+        entitlements = EntitlementCache(loader=loader, maxsize=10, ttl=300)
+        await entitlements.get("user1")
+        await entitlements.get("user2")
+
+        entitlements.invalidate_group("g1")
+        await entitlements.get("user1")
+        await entitlements.get("user2")
+
+        assert [c.args[0] for c in loader.await_args_list] == [
+            "user1",
+            "user2",
+            "user1",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_invalidation_during_load_is_not_cached(self):
+        """Testa que um resultado calculado antes da invalidação não fica em cache."""
+        entitlements = None
+
+        async def loader(user_id):
+            entitlements.invalidate_user(user_id)
+            return ["g1"], {"old-dash"}
+
+        entitlements = EntitlementCache(loader=loader, maxsize=10, ttl=300)
+
+        await entitlements.get("user1")
+
+        assert entitlements.stats()["size"] == 0
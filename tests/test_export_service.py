@@ -0,0 +1,51 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import Mock, patch
+from src.services.export_service import ExportService
+
+
+def page_response(items: list) -> Mock:
+    response = Mock()
+    response.json.return_value = {"items": items}
+    return response
+
+
+class TestExportService:
+    @pytest.mark.asyncio
+    @patch("src.clients.pocketbase.settings.POCKETBASE_PAGE_SIZE", 2)
+    @patch("src.services.export_service.pocketbase.get")
+    async def test_export_users_streams_ndjson(self, mock_get):
+        """Testa a exportação de usuários em NDJSON página a página."""
+        pages = {
+            1: [{"id": "u1", "username": "um"}, {"id": "u2", "username": "dois"}],
+            2: [{"id": "u3", "username": "três", "password": "x"}],
+        }
+        mock_get.side_effect = lambda path, params: page_response(
+            pages[params["page"]]
+        )
+
+        chunks = [chunk async for chunk in ExportService.export_users()]
+
+        rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+        assert len(chunks) == 2
+        assert [row["id"] for row in rows] == ["u1", "u2", "u3"]
+        assert rows[2]["username"] == "três" and "password" not in rows[2]
+
+    @pytest.mark.asyncio
+    @patch("src.clients.pocketbase.settings.POCKETBASE_PAGE_SIZE", 1)
+    @patch("src.services.export_service.pocketbase.get")
+    async def test_next_page_is_prefetched(self, mock_get):
+        """Testa que a próxima página é buscada antes de a atual ser consumida."""
+        pages = {1: [{"id": "m1"}], 2: [{"id": "m2"}], 3: []}
+        mock_get.side_effect = lambda path, params: page_response(
+            pages[params["page"]]
+        )
+        export = ExportService.export_memberships()
+
+        first = await anext(export)
+        await asyncio.sleep(0)
+
+        assert json.loads(first)["id"] == "m1"
+        assert mock_get.call_count == 2
+        await export.aclose()
@@ -47,3 +47,15 @@ class TestGroupController:
 
         assert response.status_code == 200
         assert response.json()["name"] == "New Group"
+
+    @patch("src.middlewares.auth.AuthService.verify_token")
+    def test_get_group_users_rejects_invalid_paging(self, mock_verify):
+        """Testa os limites de page e perPage na lista de usuários do grupo."""
+        mock_verify.return_value = {"id": "user123", "role": "user"}
+        headers = {"Authorization": "Bearer test_token"}
+
+        for params in ({"page": 0}, {"perPage": 0}, {"perPage": 501}):
+            response = client.get(
+                "/app/groups/g1/users", params=params, headers=headers
+            )
+            assert response.status_code == 422
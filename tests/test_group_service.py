@@ -1,11 +1,14 @@
 import pytest
 from unittest.mock import Mock, patch
+from fastapi import HTTPException
+from src.services import group_service
 from src.services.group_service import GroupService
 
 
 class TestGroupService:
-    @patch("src.services.group_service.requests.get")
-    def test_get_group_success(self, mock_get):
+    @pytest.mark.asyncio
+    @patch("src.services.group_service.pocketbase.get")
+    async def test_get_group_success(self, mock_get):
         """Testa obtenção de grupo por ID."""
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -15,13 +18,14 @@ class TestGroupService:
         }
         mock_get.return_value = mock_response
 
-        result = GroupService.get_group("123")
+        result = await GroupService.get_group("123")
 
         assert result["id"] == "123"
         assert result["name"] == "Test Group"
 
-    @patch("src.services.group_service.requests.get")
-    def test_get_groups_success(self, mock_get):
+    @pytest.mark.asyncio
+    @patch("src.services.group_service.pocketbase.get")
+    async def test_get_groups_success(self, mock_get):
         """Testa listagem de grupos."""
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -32,12 +36,13 @@ class TestGroupService:
         }
         mock_get.return_value = mock_response
 
-        result = GroupService.get_groups()
+        result = await GroupService.get_groups()
 
         assert len(result["items"]) == 2
 
-    @patch("src.services.group_service.requests.post")
-    def test_create_group_success(self, mock_post):
+    @pytest.mark.asyncio
+    @patch("src.services.group_service.pocketbase.post")
+    async def test_create_group_success(self, mock_post):
         """Testa criação de grupo."""
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -48,13 +53,14 @@ class TestGroupService:
         }
         mock_post.return_value = mock_response
 
-        result = GroupService.create_group("New Group", "New Description", True)
+        result = await GroupService.create_group("New Group", "New Description", True)
 
         assert result["id"] == "123"
         assert result["name"] == "New Group"
 
-    @patch("src.services.group_service.requests.patch")
-    def test_update_group_success(self, mock_patch):
+    @pytest.mark.asyncio
+    @patch("src.services.group_service.pocketbase.patch")
+    async def test_update_group_success(self, mock_patch):
         """Testa atualização de grupo."""
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -65,25 +71,29 @@ class TestGroupService:
         mock_patch.return_value = mock_response
 
         update_data = {"name": "Updated Group"}
-        result = GroupService.update_group("123", update_data)
+        result = await GroupService.update_group("123", update_data)
 
         assert result["name"] == "Updated Group"
 
-    @patch("src.services.group_service.requests.delete")
-    def test_delete_group_success(self, mock_delete):
+    @pytest.mark.asyncio
+    @patch("src.services.group_service.pocketbase.delete")
+    async def test_delete_group_success(self, mock_delete):
         """Testa exclusão de grupo."""
         mock_response = Mock()
         mock_response.status_code = 204
         mock_delete.return_value = mock_response
 
-        result = GroupService.delete_group("123")
+        result = await GroupService.delete_group("123")
 
         assert result["message"] == "Group deleted successfully"
 
-    @patch("src.services.group_service.requests.post")
-    def test_add_user_to_group_success(self, mock_post):
+    @pytest.mark.asyncio
+    @patch("src.services.group_service.pocketbase.list_any", return_value=[])
+    @patch("src.services.group_service.pocketbase.post")
+    async def test_add_user_to_group_success(self, mock_post, mock_list_any):
         """Testa adição de usuário a grupo."""
         mock_response = Mock()
+        mock_response.status_code = 200
         mock_response.json.return_value = {
             "id": "assoc123",
             "group_id": "group123",
@@ -91,15 +101,18 @@ class TestGroupService:
         }
         mock_post.return_value = mock_response
 
-        result = GroupService.add_user_to_group("group123", "user123")
+        result = await GroupService.add_user_to_group("group123", "user123")
 
         assert result["group_id"] == "group123"
         assert result["user_id"] == "user123"
 
-    @patch("src.services.group_service.requests.post")
-    def test_add_dashboard_to_group_success(self, mock_post):
+    @pytest.mark.asyncio
+    @patch("src.services.group_service.pocketbase.list_any", return_value=[])
+    @patch("src.services.group_service.pocketbase.post")
+    async def test_add_dashboard_to_group_success(self, mock_post, mock_list_any):
         """Testa adição de dashboard a grupo."""
         mock_response = Mock()
+        mock_response.status_code = 200
         mock_response.json.return_value = {
             "id": "assoc123",
             "group_id": "group123",
@@ -107,7 +120,175 @@ class TestGroupService:
         }
         mock_post.return_value = mock_response
 
-        result = GroupService.add_dashboard_to_group("group123", "dash123")
+        result = await GroupService.add_dashboard_to_group("group123", "dash123")
 
         assert result["group_id"] == "group123"
         assert result["dashboard_id"] == "dash123"
+
+    @pytest.mark.asyncio
+    @patch("src.services.group_service.pocketbase.list_any")
+    async def test_get_dashboard_ids_queries_all_groups_at_once(self, mock_list_any):
+        """Testa a busca dos dashboards de vários grupos numa única consulta."""
+        mock_list_any.return_value = [
+            {"group_id": "g1", "dashboard_id": "dash1"},
+            {"group_id": "g2", "dashboard_id": "dash2"},
+            {"group_id": "g2", "dashboard_id": "dash1"},
+        ]
+
+        result = await GroupService.get_dashboard_ids(["g1", "g2"])
+
+        assert result == {"dash1", "dash2"}
+        mock_list_any.assert_awaited_once_with(
+            "groups_dashboards", "group_id", ["g1", "g2"]
+        )
+
+    @pytest.mark.asyncio
+    @patch("src.services.group_service.pocketbase.list_any", return_value=[])
+    @patch("src.services.group_service.pocketbase.post")
+    async def test_add_dashboard_to_group_invalidates_entitlements(self, mock_post, mock_list_any):
+        """Testa que vincular um dashboard invalida as permissões do grupo."""
+        mock_post.return_value = Mock(status_code=200)
+
+        with patch.object(group_service.entitlements, "invalidate_group") as mock_inv:
+            await GroupService.add_dashboard_to_group("group123", "dash123")
+
+        mock_inv.assert_called_once_with("group123")
+
+    @pytest.mark.asyncio
+    @patch("src.services.group_service.pocketbase.list_any", return_value=[])
+    @patch("src.services.group_service.pocketbase.post")
+    async def test_add_user_to_group_rejected(self, mock_post, mock_list_any):
+        """Testa que uma criação recusada não altera réplica nem permissões."""
+        mock_response = Mock()
+        mock_response.status_code = 400
+        mock_response.json.return_value = {"message": "Failed to create record."}
+        mock_post.return_value = mock_response
+
+        with (
+            patch.object(group_service.access_replica, "apply") as mock_apply,
+            patch.object(group_service.entitlements, "invalidate_user") as mock_inv,
+            pytest.raises(HTTPException) as exc_info,
+        ):
+            await GroupService.add_user_to_group("group123", "user123")
+
+        assert exc_info.value.status_code == 400
+        assert exc_info.value.detail == {"message": "Failed to create record."}
+        mock_apply.assert_not_called()
+        mock_inv.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("src.services.group_service.pocketbase.list_any")
+    @patch("src.services.group_service.pocketbase.get")
+    async def test_get_group_users_resolves_page_in_bulk(self, mock_get, mock_list_any):
+        """Testa a resolução dos usuários da página numa consulta em lote."""
+        mock_response = Mock()
+        mock_response.json.return_value = {
+            "items": [
+                {"id": "m1", "user_id": "u1"},
+                {"id": "m2", "user_id": "deleted"},
+            ]
+        }
+        mock_get.return_value = mock_response
+        mock_list_any.return_value = [
+            {"id": "u1", "username": "user1", "email": "u1@test.com"}
+        ]
+
+        result = await GroupService.get_group_users("group123", page=2, per_page=2)
+
+        assert [user["user_id"] for user in result] == ["u1"]
+        assert mock_get.call_args.kwargs["params"]["page"] == 2
+        mock_list_any.assert_awaited_once_with("auth_users", "id", ["u1", "deleted"])
+
+    @pytest.mark.asyncio
+    @patch("src.services.group_service.pocketbase.list_all")
+    async def test_get_group_dashboards_reads_all_links(self, mock_list_all):
+        """Testa a leitura de todos os vínculos do grupo, com o id escapado."""
+        mock_list_all.return_value = [
+            {"dashboard_id": "dash1"},
+            {"dashboard_id": "removed"},
+        ]
+        dashboards_by_id = {"dash1": {"id": "dash1", "name": "Dashboard 1"}}
+
+        result = await GroupService.get_group_dashboards("it's", dashboards_by_id)
+
+        assert result == [{"id": "dash1", "name": "Dashboard 1"}]
+        mock_list_all.assert_awaited_once_with(
+            "groups_dashboards", filter="group_id='it\\'s'"
+        )
+
+    @pytest.mark.asyncio
+    @patch("src.services.group_service.pocketbase.batch")
+    @patch("src.services.group_service.pocketbase.list_any")
+    async def test_add_users_to_group_skips_existing(self, mock_list_any, mock_batch):
+        """Testa a adição em lote ignorando vínculos já existentes."""
+        mock_list_any.return_value = [{"id": "m1", "group_id": "g1", "user_id": "u1"}]
+        mock_batch.return_value = [
+            {"status": 200, "body": {"id": "m2", "group_id": "g1", "user_id": "u2"}},
+            {"status": 400, "body": {"message": "invalid user"}},
+        ]
+
+        result = await GroupService.add_users_to_group("g1", ["u1", "u2", "bad", "u2"])
+
+        assert [r["status"] for r in result["results"]] == ["exists", "added", "failed"]
+        assert result["summary"] == {"exists": 1, "added": 1, "failed": 1}
+        requests = mock_batch.await_args.args[0]
+        assert [r["body"]["user_id"] for r in requests] == ["u2", "bad"]
+
+    @pytest.mark.asyncio
+    @patch("src.services.group_service.pocketbase.batch")
+    @patch("src.services.group_service.pocketbase.list_any")
+    async def test_remove_dashboards_from_group_deletes_duplicates(
+        self, mock_list_any, mock_batch
+    ):
+        """Testa a remoção em lote de todos os vínculos, inclusive duplicados."""
+        mock_list_any.return_value = [
+            {"id": "l1", "group_id": "g1", "dashboard_id": "dash1"},
+            {"id": "l2", "group_id": "g1", "dashboard_id": "dash1"},
+        ]
+        mock_batch.return_value = [{"status": 204}, {"status": 204}]
+
+        result = await GroupService.remove_dashboards_from_group(
+            "g1", ["dash1", "dash2"]
+        )
+
+        assert result["summary"] == {"removed": 1, "not_found": 1}
+        urls = [r["url"] for r in mock_batch.await_args.args[0]]
+        assert urls == [
+            "/api/collections/groups_dashboards/records/l1",
+            "/api/collections/groups_dashboards/records/l2",
+        ]
+
+    @pytest.mark.asyncio
+    @patch("src.services.group_service.pocketbase.post")
+    @patch("src.services.group_service.pocketbase.list_any")
+    async def test_add_user_to_group_is_idempotent(self, mock_list_any, mock_post):
+        """Testa que adicionar um vínculo existente retorna o registro atual."""
+        existing = {"id": "m1", "group_id": "group123", "user_id": "user123"}
+        mock_list_any.return_value = [existing]
+
+        result = await GroupService.add_user_to_group("group123", "user123")
+
+        assert result == existing
+        mock_post.assert_not_called()
+        mock_list_any.assert_awaited_once_with(
+            "groups_users", "user_id", ["user123"], filter="group_id='group123'"
+        )
+
+    @pytest.mark.asyncio
+    @patch("src.services.group_service.pocketbase.batch")
+    @patch("src.services.group_service.pocketbase.list_any")
+    async def test_remove_user_from_group_removes_duplicates(
+        self, mock_list_any, mock_batch
+    ):
+        """Testa a remoção de todos os vínculos duplicados numa única chamada."""
+        mock_list_any.return_value = [
+            {"id": "m1", "group_id": "group123", "user_id": "user123"},
+            {"id": "m2", "group_id": "group123", "user_id": "user123"},
+        ]
+        mock_batch.return_value = [{"status": 204}, {"status": 204}]
+
+        result = await GroupService.remove_user_from_group("group123", "user123")
+
+        assert result["message"] == "User removed from group successfully"
+        assert len(mock_batch.await_args.args[0]) == 2
+        mock_batch.assert_awaited_once()
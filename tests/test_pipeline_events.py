@@ -0,0 +1,74 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import Mock, patch
+from src.services.pipeline_events import PipelineRunWatcher
+
+
+def run_response(state: str) -> Mock:
+    response = Mock()
+    response.status_code = 200
+    response.json.return_value = {"dag_run_id": "run1", "state": state}
+    return response
+
+
+async def collect(stream) -> list[dict]:
+    """Lê os eventos SSE até o fim do stream."""
+    events = []
+    async for chunk in stream:
+        if chunk.startswith("event:"):
+            data = chunk.split("data: ", 1)[1]
+            events.append(json.loads(data))
+    return events
+
+
+class TestPipelineRunWatcher:
+    @pytest.mark.asyncio
+    @patch("src.services.pipeline_events.settings.AIRFLOW_RUN_POLL_SECONDS", 0)
+    @patch("src.services.pipeline_events.airflow.get")
+    async def test_clients_share_one_poller(self, mock_get):
+        """Testa um único poller por execução, parando no estado terminal."""
+        states = ["queued", "running", "running", "success"]
+        mock_get.side_effect = [run_response(state) for state in states]
+        watcher = PipelineRunWatcher()
+
+        first, second = await asyncio.gather(
+            collect(watcher.events("dag1", "run1")),
+            collect(watcher.events("dag1", "run1")),
+        )
+
+        assert [e["state"] for e in first] == ["queued", "running", "success"]
+        assert second == first
+        assert first[-1]["final"] is True
+        assert mock_get.await_count == 4
+        assert watcher.active() == 0
+
+    @pytest.mark.asyncio
+    @patch("src.services.pipeline_events.airflow.get")
+    async def test_missing_run_ends_stream(self, mock_get):
+        """Testa o evento de erro quando a execução não existe."""
+        response = Mock()
+        response.status_code = 404
+        mock_get.return_value = response
+        watcher = PipelineRunWatcher()
+
+        events = await collect(watcher.events("dag1", "missing"))
+
+        assert events == [{"error": "DAG run not found", "final": True}]
+
+    @pytest.mark.asyncio
+    @patch("src.services.pipeline_events.settings.AIRFLOW_RUN_POLL_SECONDS", 0)
+    @patch("src.services.pipeline_events.airflow.get")
+    async def test_poller_stops_without_clients(self, mock_get):
+        """Testa que o poller é cancelado quando o último cliente sai."""
+        mock_get.return_value = run_response("running")
+        watcher = PipelineRunWatcher()
+
+        stream = watcher.events("dag1", "run1")
+        assert "running" in await anext(stream)
+        poller = watcher._pollers[("dag1", "run1")]
+        await stream.aclose()
+        await asyncio.sleep(0)
+
+        assert watcher.active() == 0
+        assert poller.task.cancelled()
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import httpx
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from src.clients.pocketbase import PocketBaseClient
+
+
+class TestPocketBaseClient:
+    @pytest.mark.asyncio
+    @patch("src.clients.pocketbase.settings.POCKETBASE_URL", "http://pb.local")
+    async def test_client_is_reused(self):
+        """Testa que o mesmo cliente (e pool) é reutilizado entre chamadas."""
+        client = PocketBaseClient()
+
+        first = client.client
+        second = client.client
+
+        assert first is second
+        assert str(first.base_url) == "http://pb.local"
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    @patch("src.clients.pocketbase.settings.POCKETBASE_URL", "http://pb.local")
+    @patch("src.clients.pocketbase.settings.POCKETBASE_READ_TIMEOUT", 12.0)
+    @patch("src.clients.pocketbase.settings.POCKETBASE_CONNECT_TIMEOUT", 3.0)
+    async def test_client_uses_configured_timeouts(self):
+        """Testa os timeouts configurados em settings."""
+        client = PocketBaseClient()
+
+        timeout = client.client.timeout
+
+        assert timeout.connect == 3.0
+        assert timeout.read == 12.0
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_aclose_resets_client(self):
+        """Testa que o fechamento descarta o cliente para recriação posterior."""
+        client = PocketBaseClient()
+        first = client.client
+
+        await client.aclose()
+
+        assert first.is_closed
+        assert client.client is not first
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    @patch("src.clients.pocketbase.settings.POCKETBASE_PAGE_SIZE", 2)
+    @patch("src.clients.pocketbase.settings.POCKETBASE_FILTER_CHUNK_SIZE", 2)
+    async def test_list_any_pages_each_chunk(self):
+        """Testa os filtros OR em blocos e a paginação de cada bloco."""
+        client = PocketBaseClient()
+        pages = {
+            ("(group_id='g1' || group_id='g2')", 1): [{"id": "1"}, {"id": "2"}],
+            ("(group_id='g1' || group_id='g2')", 2): [{"id": "3"}],
+            ("(group_id='it\\'s')", 1): [{"id": "4"}],
+        }
+
+        def page(path, params):
+            response = Mock()
+            response.json.return_value = {
+                "items": pages[(params["filter"], params["page"])]
+            }
+            return response
+
+        with patch.object(client, "get", AsyncMock(side_effect=page)) as mock_get:
+            items = await client.list_any(
+                "groups_dashboards", "group_id", ["g1", "g2", "g1", "it's"]
+            )
+
+        assert [item["id"] for item in items] == ["1", "2", "3", "4"]
+        assert mock_get.await_count == 3
+
+    @pytest.mark.asyncio
+    @patch("src.clients.pocketbase.settings.POCKETBASE_PAGE_SIZE", 5)
+    @patch("src.clients.pocketbase.settings.POCKETBASE_MAX_PER_PAGE", 2)
+    async def test_list_all_respects_server_page_limit(self):
+        """Testa a paginação quando o servidor devolve menos que o pedido."""
+        client = PocketBaseClient()
+        records = [{"id": str(i)} for i in range(5)]
+
+        def page(path, params):
+            # O servidor limita a página ao seu máximo (2)
+            per_page = min(params["perPage"], 2)
+            start = (params["page"] - 1) * per_page
+            response = Mock()
+            response.json.return_value = {"items": records[start : start + per_page]}
+            return response
+
+        with patch.object(client, "get", AsyncMock(side_effect=page)):
+            items = await client.list_all("auth_users")
+
+        assert items == records
+
+    @pytest.mark.asyncio
+    @patch("src.clients.pocketbase.settings.POCKETBASE_FILTER_CHUNK_SIZE", 1)
+    @patch("src.clients.pocketbase.settings.POCKETBASE_MAX_CONCURRENCY", 2)
+    async def test_list_any_limits_concurrent_chunks(self):
+        """Testa o limite de blocos consultados ao mesmo tempo."""
+        client = PocketBaseClient()
+        running = {"now": 0, "peak": 0}
+
+        async def list_all(collection, filter, **params):
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(0)
+            running["now"] -= 1
+            return [{"id": filter}]
+
+        with patch.object(client, "list_all", side_effect=list_all):
+            items = await client.list_any("auth_users", "id", ["a", "b", "c", "d"])
+
+        assert len(items) == 4
+        assert running["peak"] == 2
+
+    @pytest.mark.asyncio
+    @patch("src.clients.pocketbase.settings.POCKETBASE_URL", "http://pb.local")
+    async def test_realtime_subscribes_and_parses_events(self):
+        """Testa a assinatura após PB_CONNECT e a leitura dos eventos SSE."""
+        stream = (
+            'id:c1\nevent:PB_CONNECT\ndata:{"clientId":"c1"}\n\n'
+            ": ping\n\n"
+            'event:groups/*\ndata:{"action":"delete","record":{"id":"g1"}}\n\n'
+        )
+        subscriptions = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.method == "POST":
+                subscriptions.append(json.loads(request.content))
+                return httpx.Response(204)
+            return httpx.Response(200, text=stream)
+
+        client = PocketBaseClient()
+        client._client = httpx.AsyncClient(
+            base_url="http://pb.local", transport=httpx.MockTransport(handler)
+        )
+
+        events = [event async for event in client.realtime(["groups/*"])]
+
+        assert events == [
+            ("PB_CONNECT", {"clientId": "c1"}),
+            ("groups/*", {"action": "delete", "record": {"id": "g1"}}),
+        ]
+        assert subscriptions == [{"clientId": "c1", "subscriptions": ["groups/*"]}]
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    @patch("src.clients.pocketbase.settings.POCKETBASE_BATCH_SIZE", 2)
+    async def test_batch_reports_failed_chunk_per_request(self):
+        """Testa os blocos de /api/batch e o erro repetido por requisição."""
+        client = PocketBaseClient()
+        ok = Mock(status_code=200)
+        ok.json.return_value = [{"status": 200}, {"status": 200}]
+        failed = Mock(status_code=400)
+        failed.json.return_value = {"message": "Batch transaction failed."}
+
+        with patch.object(client, "post", AsyncMock(side_effect=[ok, failed])):
+            results = await client.batch([{"method": "DELETE", "url": "/x"}] * 3)
+
+        assert [result["status"] for result in results] == [200, 200, 400]
@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from src.services.powerbi_catalog import PowerBICatalog
+
+
+def catalog_result(reports: dict, errors: list | None = None) -> dict:
+    """Monta o retorno do loader no formato de PowerBIService._load_catalog."""
+    return {
+        "workspaces": [{"id": "ws1", "name": "WS 1"}, {"id": "ws2", "name": "WS 2"}],
+        "reports": reports,
+        "errors": errors or [],
+    }
+
+
+class TestPowerBICatalog:
+    @pytest.mark.asyncio
+    async def test_indexes_reports(self):
+        """Testa os índices por relatório e por workspace."""
+        loader = AsyncMock(
+            return_value=catalog_result(
+                {
+                    "ws1": [{"id": "r1", "groupId": "ws1"}],
+                    "ws2": [{"id": "r2", "groupId": "ws2"}],
+                }
+            )
+        )
+        catalog = PowerBICatalog(loader=loader, ttl=300)
+
+        snapshot = await catalog.get()
+
+        assert [d["id"] for d in snapshot.dashboards] == ["r1", "r2"]
+        assert snapshot.by_id["r2"]["groupId"] == "ws2"
+        assert [d["id"] for d in snapshot.by_workspace["ws1"]] == ["r1"]
+
+    @pytest.mark.asyncio
+    async def test_serves_stale_while_refreshing(self):
+        """Testa que o catálogo vencido é servido enquanto atualiza em background."""
+        loader = AsyncMock(
+            side_effect=[
+                catalog_result({"ws1": [{"id": "r1", "groupId": "ws1"}]}),
+                catalog_result({"ws1": [{"id": "r9", "groupId": "ws1"}]}),
+            ]
+        )
+        catalog = PowerBICatalog(loader=loader, ttl=300)
+        await catalog.get()
+
+        with patch("src.services.powerbi_catalog.time.monotonic", return_value=1e12):
+            first = await catalog.get()
+            second = await catalog.get()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        assert "r1" in first.by_id and "r1" in second.by_id
+        assert loader.await_count == 2
+        assert "r9" in (await catalog.get()).by_id
+
+    @pytest.mark.asyncio
+    async def test_failed_workspace_keeps_previous_reports(self):
+        """Testa que um workspace com falha mantém os relatórios anteriores."""
+        loader = AsyncMock(
+            side_effect=[
+                catalog_result(
+                    {
+                        "ws1": [{"id": "r1", "groupId": "ws1"}],
+                        "ws2": [{"id": "r2", "groupId": "ws2"}],
+                    }
+                ),
+                catalog_result(
+                    {"ws1": [{"id": "r1", "groupId": "ws1"}]},
+                    errors=[
+                        {"groupId": "ws2", "error": "Failed to retrieve dashboards"}
+                    ],
+                ),
+            ]
+        )
+        catalog = PowerBICatalog(loader=loader, ttl=300)
+        await catalog.get()
+
+        snapshot = await catalog.refresh()
+
+        assert "r2" in snapshot.by_id
+        assert snapshot.errors[0]["groupId"] == "ws2"
+
+    @pytest.mark.asyncio
+    async def test_incremental_refresh_bumps_version_on_change(self):
+        """Testa a atualização incremental e o contador de versão."""
+        loader = AsyncMock(
+            side_effect=[
+                catalog_result(
+                    {
+                        "ws1": [{"id": "r1", "groupId": "ws1"}],
+                        "ws2": [{"id": "r2", "groupId": "ws2"}],
+                    }
+                ),
+                catalog_result({}),
+                catalog_result({"ws2": [{"id": "r3", "groupId": "ws2"}]}),
+            ]
+        )
+        catalog = PowerBICatalog(loader=loader, ttl=300)
+        first = await catalog.get()
+
+        unchanged = await catalog.refresh()
+        changed = await catalog.refresh()
+
+        previous, since = loader.await_args_list[1].args
+        assert loader.await_args_list[0].args == (None, None)
+        assert previous is first and since is not None
+        assert first.version == unchanged.version == 1
+        assert changed.version == 2
+        assert [d["id"] for d in changed.dashboards] == ["r1", "r3"]
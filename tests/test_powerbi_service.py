@@ -1,11 +1,32 @@
 import pytest
 from unittest.mock import Mock, patch, MagicMock
+from src.services import powerbi_service
 from src.services.powerbi_service import PowerBIService
 
 
+@pytest.fixture(autouse=True)
+def reset_token_provider(monkeypatch):
+    """Isola os testes da aplicação MSAL e do token compartilhados."""
+    monkeypatch.setattr(powerbi_service, "_tokens", powerbi_service._TokenProvider())
+    monkeypatch.setattr(powerbi_service, "_admin_api", powerbi_service._AdminApiState())
+
+
+@pytest.fixture(autouse=True)
+def reset_catalog(monkeypatch):
+    """Garante que cada teste carregue o catálogo do zero."""
+    monkeypatch.setattr(
+        powerbi_service,
+        "catalog",
+        powerbi_service.PowerBICatalog(
+            loader=PowerBIService._load_catalog, ttl=300
+        ),
+    )
+
+
 class TestPowerBIService:
+    @pytest.mark.asyncio
     @patch("src.services.powerbi_service.msal.ConfidentialClientApplication")
-    def test_acquire_bearer_token_success(self, mock_msal):
+    async def test_acquire_bearer_token_success(self, mock_msal):
         """Testa aquisição de token do Azure."""
         mock_app = Mock()
         mock_app.acquire_token_for_client.return_value = {
@@ -13,13 +34,48 @@ class TestPowerBIService:
         }
         mock_msal.return_value = mock_app
 
-        result = PowerBIService.acquire_bearer_token()
+        result = await PowerBIService.acquire_bearer_token()
 
         assert result == "test_token"
 
+    @pytest.mark.asyncio
+    @patch("src.services.powerbi_service.msal.ConfidentialClientApplication")
+    async def test_acquire_bearer_token_reuses_app_and_token(self, mock_msal):
+        """Testa que a aplicação MSAL e o token são reaproveitados até expirar."""
+        mock_app = Mock()
+        mock_app.acquire_token_for_client.return_value = {
+            "access_token": "test_token",
+            "expires_in": 3599,
+        }
+        mock_msal.return_value = mock_app
+
+        first = await PowerBIService.acquire_bearer_token()
+        second = await PowerBIService.acquire_bearer_token()
+
+        assert first == second == "test_token"
+        mock_msal.assert_called_once()
+        mock_app.acquire_token_for_client.assert_called_once()
+
+    @pytest.mark.asyncio
+    @patch("src.services.powerbi_service.msal.ConfidentialClientApplication")
+    async def test_forced_refresh_bypasses_msal_cache(self, mock_msal):
+        """Testa que a renovação antecipada descarta o token em cache no MSAL."""
+        mock_app = Mock()
+        mock_app.acquire_token_for_client.return_value = {
+            "access_token": "new_token",
+            "expires_in": 3599,
+        }
+        mock_msal.return_value = mock_app
+
+        result = await PowerBIService._request_token(force_refresh=True)
+
+        assert result == "new_token"
+        mock_app.remove_tokens_for_client.assert_called_once()
+
+    @pytest.mark.asyncio
     @patch("src.services.powerbi_service.PowerBIService.acquire_bearer_token")
-    @patch("src.services.powerbi_service.requests.get")
-    def test_get_dashboards_success(self, mock_get, mock_token):
+    @patch("src.services.powerbi_service.powerbi.get")
+    async def test_get_dashboards_success(self, mock_get, mock_token):
         """Testa obtenção de dashboards do Power BI."""
         mock_token.return_value = "test_token"
 
@@ -46,15 +102,184 @@ class TestPowerBIService:
 
         mock_get.side_effect = [mock_groups_response, mock_reports_response]
 
-        result = PowerBIService.get_dashboards()
+        result = await PowerBIService.get_dashboards()
 
         assert "dashboards" in result
         assert len(result["dashboards"]) == 1
         assert result["dashboards"][0]["id"] == "report1"
 
+    @pytest.mark.asyncio
+    @patch("src.services.powerbi_service.PowerBIService.acquire_bearer_token")
+    @patch("src.services.powerbi_service.powerbi.get")
+    async def test_get_dashboards_reports_failed_workspace(self, mock_get, mock_token):
+        """Testa que a falha de um workspace não descarta os demais."""
+        mock_token.return_value = "test_token"
+
+        def response(status_code, value):
+            mock_response = Mock()
+            mock_response.status_code = status_code
+            mock_response.json.return_value = {"value": value}
+            return mock_response
+
+        responses = {
+            "/groups": response(
+                200,
+                [
+                    {"id": "group1", "name": "Group 1"},
+                    {"id": "group2", "name": "Group 2"},
+                    {"id": "group3", "name": "Group 3"},
+                ],
+            ),
+            "/groups/group1/reports": response(200, [{"id": "report1"}]),
+            "/groups/group2/reports": response(403, []),
+            "/groups/group3/reports": response(200, [{"id": "report3"}]),
+        }
+        mock_get.side_effect = lambda path, **kwargs: responses[path]
+
+        result = await PowerBIService.get_dashboards()
+
+        assert [d["id"] for d in result["dashboards"]] == ["report1", "report3"]
+        assert result["errors"] == [
+            {
+                "groupId": "group2",
+                "groupName": "Group 2",
+                "error": "Failed to retrieve dashboards",
+                "status_code": 403,
+            }
+        ]
+
+    @pytest.mark.asyncio
+    @patch("src.services.powerbi_service.settings.POWERBI_ADMIN_PAGE_SIZE", 1)
+    @patch("src.services.powerbi_service.settings.POWERBI_USE_ADMIN_API", True)
+    @patch("src.services.powerbi_service.PowerBIService.acquire_bearer_token")
+    @patch("src.services.powerbi_service.powerbi.get")
+    async def test_get_dashboards_from_admin_api(self, mock_get, mock_token):
+        """Testa a carga paginada do catálogo via admin/groups?$expand=reports."""
+        mock_token.return_value = "test_token"
+        pages = [
+            [{"id": "group1", "name": "Group 1", "reports": [{"id": "report1"}]}],
+            [{"id": "group2", "name": "Group 2", "reports": [{"id": "report2"}]}],
+            [],
+        ]
+
+        def admin_page(path, params, **kwargs):
+            assert path == "/admin/groups"
+            mock_response = Mock()
+            mock_response.status_code = 200
+            mock_response.json.return_value = {"value": pages[params["$skip"]]}
+            return mock_response
+
+        mock_get.side_effect = admin_page
+
+        result = await PowerBIService.get_dashboards()
+
+        assert [d["id"] for d in result["dashboards"]] == ["report1", "report2"]
+        assert result["dashboards"][1]["groupName"] == "Group 2"
+        assert mock_get.call_count == 3
+
+    @pytest.mark.asyncio
+    @patch("src.services.powerbi_service.settings.POWERBI_USE_ADMIN_API", True)
+    @patch("src.services.powerbi_service.PowerBIService.acquire_bearer_token")
+    @patch("src.services.powerbi_service.powerbi.get")
+    async def test_incremental_sync_refetches_modified_workspaces(
+        self, mock_get, mock_token
+    ):
+        """Testa que só os workspaces alterados são relidos na sincronização."""
+        mock_token.return_value = "test_token"
+        groups = [
+            {"id": "group1", "name": "Group 1", "reports": [{"id": "report1"}]},
+            {"id": "group2", "name": "Group 2", "reports": [{"id": "report2"}]},
+        ]
+
+        def admin_api(path, params, **kwargs):
+            mock_response = Mock()
+            mock_response.status_code = 200
+            if path == "/admin/workspaces/modified":
+                assert params["excludePersonalWorkspaces"] == "false"
+                mock_response.json.return_value = [{"id": "group2"}]
+            elif "id eq 'group2'" in params["$filter"]:
+                mock_response.json.return_value = {
+                    "value": [
+                        {
+                            "id": "group2",
+                            "name": "Group 2",
+                            "reports": [{"id": "report3"}],
+                        }
+                    ]
+                }
+            else:
+                mock_response.json.return_value = {"value": groups}
+            return mock_response
+
+        mock_get.side_effect = admin_api
+        first = await powerbi_service.catalog.refresh()
+
+        snapshot = await powerbi_service.catalog.refresh()
+
+        filters = [c.kwargs["params"].get("$filter") for c in mock_get.call_args_list]
+        assert filters[-1] == "state eq 'Active' and (id eq 'group2')"
+        assert [d["id"] for d in snapshot.dashboards] == ["report1", "report3"]
+        assert snapshot.by_workspace["group1"] is first.by_workspace["group1"]
+        assert snapshot.version == first.version + 1
+
+    @pytest.mark.asyncio
+    @patch("src.services.powerbi_service.settings.POWERBI_USE_ADMIN_API", True)
+    @patch("src.services.powerbi_service.PowerBIService.acquire_bearer_token")
+    @patch("src.services.powerbi_service.powerbi.get")
+    async def test_admin_api_falls_back_to_workspaces(self, mock_get, mock_token):
+        """Testa o fallback por workspace quando a API admin é negada."""
+        mock_token.return_value = "test_token"
+
+        def response(status_code, value):
+            mock_response = Mock()
+            mock_response.status_code = status_code
+            mock_response.json.return_value = {"value": value}
+            return mock_response
+
+        responses = {
+            "/admin/groups": response(403, []),
+            "/groups": response(200, [{"id": "group1", "name": "Group 1"}]),
+            "/groups/group1/reports": response(200, [{"id": "report1"}]),
+        }
+        mock_get.side_effect = lambda path, **kwargs: responses[path]
+
+        result = await PowerBIService.get_dashboards()
+
+        assert [d["id"] for d in result["dashboards"]] == ["report1"]
+        assert not powerbi_service._admin_api.is_available()
+
+    @pytest.mark.asyncio
+    @patch("src.services.powerbi_service.settings.POWERBI_USE_ADMIN_API", True)
+    @patch("src.services.powerbi_service.PowerBIService.acquire_bearer_token")
+    @patch("src.services.powerbi_service.powerbi.get")
+    async def test_admin_api_throttling_keeps_catalog(self, mock_get, mock_token):
+        """Testa que um 429 da API admin mantém o catálogo anterior."""
+        mock_token.return_value = "test_token"
+        status = {"code": 200}
+
+        def admin_api(path, **kwargs):
+            assert path == "/admin/groups"
+            mock_response = Mock()
+            mock_response.status_code = status["code"]
+            mock_response.json.return_value = {
+                "value": [{"id": "group1", "name": "G", "reports": [{"id": "r1"}]}]
+            }
+            return mock_response
+
+        mock_get.side_effect = admin_api
+        first = await powerbi_service.catalog.refresh()
+        status["code"] = 429
+        powerbi_service.catalog.invalidate()
+
+        snapshot = await powerbi_service.catalog.refresh()
+
+        assert snapshot is first
+        assert powerbi_service._admin_api.is_available()
+
+    @pytest.mark.asyncio
     @patch("src.services.powerbi_service.PowerBIService.acquire_bearer_token")
-    @patch("src.services.powerbi_service.requests.get")
-    def test_get_groups_success(self, mock_get, mock_token):
+    @patch("src.services.powerbi_service.powerbi.get")
+    async def test_get_groups_success(self, mock_get, mock_token):
         """Testa obtenção de grupos do Power BI."""
         mock_token.return_value = "test_token"
         mock_response = Mock()
@@ -64,14 +289,15 @@ class TestPowerBIService:
         }
         mock_get.return_value = mock_response
 
-        result = PowerBIService.get_groups()
+        result = await PowerBIService.get_groups()
 
         assert "groups" in result
         assert len(result["groups"]) == 1
 
+    @pytest.mark.asyncio
     @patch("src.services.powerbi_service.PowerBIService.acquire_bearer_token")
-    @patch("src.services.powerbi_service.requests.get")
-    def test_get_reports_success(self, mock_get, mock_token):
+    @patch("src.services.powerbi_service.powerbi.get")
+    async def test_get_reports_success(self, mock_get, mock_token):
         """Testa obtenção de relatórios de um grupo."""
         mock_token.return_value = "test_token"
         mock_response = Mock()
@@ -81,14 +307,15 @@ class TestPowerBIService:
         }
         mock_get.return_value = mock_response
 
-        result = PowerBIService.get_reports("group123")
+        result = await PowerBIService.get_reports("group123")
 
         assert "reports" in result
         assert len(result["reports"]) == 1
 
+    @pytest.mark.asyncio
     @patch("src.services.powerbi_service.PowerBIService.acquire_bearer_token")
-    @patch("src.services.powerbi_service.requests.delete")
-    def test_delete_report_success(self, mock_delete, mock_token):
+    @patch("src.services.powerbi_service.powerbi.delete")
+    async def test_delete_report_success(self, mock_delete, mock_token):
         """Testa exclusão de relatório do Power BI."""
         mock_token.return_value = "test_token"
 
@@ -100,6 +327,6 @@ class TestPowerBIService:
 
         mock_delete.side_effect = [mock_report_response, mock_dataset_response]
 
-        result = PowerBIService.delete_report("group123", "report123", "dataset123")
+        result = await PowerBIService.delete_report("group123", "report123", "dataset123")
 
         assert result["message"] == "Report deleted successfully"
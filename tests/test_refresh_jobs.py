@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import HTTPException
+from src.services.refresh_jobs import RefreshJobQueue
+
+
+async def drain(queue: RefreshJobQueue) -> None:
+    """Roda os workers até a fila esvaziar."""
+    workers = queue.start()
+    await queue.queue.join()
+    for worker in workers:
+        worker.cancel()
+
+
+class TestRefreshJobQueue:
+    @pytest.mark.asyncio
+    @patch("src.services.refresh_jobs.AirflowService.get_dashboard_pipeline_association")
+    @patch("src.services.refresh_jobs.AirflowService.refresh_pipeline")
+    async def test_job_resolves_dashboard_pipeline(self, mock_refresh, mock_assoc):
+        """Testa o job de um dashboard, do enfileiramento ao sucesso."""
+        mock_assoc.return_value = {"pipeline_id": "dag1", "dashboard_id": "dash1"}
+        mock_refresh.return_value = {"dag_run_id": "run1"}
+        queue = RefreshJobQueue()
+
+        job = queue.submit(dashboard_id="dash1")
+        assert queue.get(job["id"])["status"] == "queued"
+        await drain(queue)
+
+        job = queue.get(job["id"])
+        assert job["status"] == "succeeded"
+        assert job["pipeline_id"] == "dag1"
+        assert job["result"] == {"dag_run_id": "run1"}
+        mock_refresh.assert_awaited_once_with("dag1")
+
+    @pytest.mark.asyncio
+    @patch("src.services.refresh_jobs.AirflowService.refresh_pipeline")
+    async def test_failed_job_records_error(self, mock_refresh):
+        """Testa que a falha do Airflow fica registrada no job."""
+        mock_refresh.side_effect = HTTPException(status_code=409, detail="conflict")
+        queue = RefreshJobQueue()
+
+        job = queue.submit(pipeline_id="dag1")
+        await drain(queue)
+
+        job = queue.get(job["id"])
+        assert job["status"] == "failed"
+        assert job["error"] == {"status_code": 409, "detail": "conflict"}
+
+    @pytest.mark.asyncio
+    @patch("src.services.refresh_jobs.settings.REFRESH_QUEUE_WORKERS", 4)
+    @patch("src.services.refresh_jobs.AirflowService.refresh_pipeline")
+    async def test_jobs_are_serialized_per_dag(self, mock_refresh):
+        """Testa que jobs da mesma DAG não rodam ao mesmo tempo."""
+        running: dict[str, int] = {}
+        peak: dict[str, int] = {}
+
+        async def refresh(pipeline_id):
+            running[pipeline_id] = running.get(pipeline_id, 0) + 1
+            peak[pipeline_id] = max(peak.get(pipeline_id, 0), running[pipeline_id])
+            await asyncio.sleep(0.01)
+            running[pipeline_id] -= 1
+            return {}
+
+        mock_refresh.side_effect = refresh
+        queue = RefreshJobQueue()
+
+        for pipeline_id in ("dag1", "dag1", "dag1", "dag2"):
+            queue.submit(pipeline_id=pipeline_id)
+        await drain(queue)
+
+        assert peak == {"dag1": 1, "dag2": 1}
+        assert queue._pending == {}
+
+    @pytest.mark.asyncio
+    @patch("src.services.refresh_jobs.settings.REFRESH_QUEUE_WORKERS", 2)
+    @patch("src.services.refresh_jobs.AirflowService.refresh_pipeline")
+    async def test_busy_dag_does_not_hold_workers(self, mock_refresh):
+        """Testa que jobs de uma DAG ocupada não atrasam outras DAGs."""
+        finished: list[str] = []
+
+        async def refresh(pipeline_id):
+            await asyncio.sleep(0.05 if pipeline_id == "dag1" else 0)
+            finished.append(pipeline_id)
+            return {}
+
+        mock_refresh.side_effect = refresh
+        queue = RefreshJobQueue()
+
+        for pipeline_id in ("dag1", "dag1", "dag1", "dag2"):
+            queue.submit(pipeline_id=pipeline_id)
+        await drain(queue)
+
+        assert finished == ["dag2", "dag1", "dag1", "dag1"]
+
+    @pytest.mark.asyncio
+    @patch("src.services.refresh_jobs.settings.REFRESH_QUEUE_SIZE", 1)
+    async def test_full_queue_is_rejected(self):
+        """Testa o 503 quando a fila está cheia."""
+        queue = RefreshJobQueue()
+        queue.submit(pipeline_id="dag1")
+
+        with pytest.raises(HTTPException) as exc_info:
+            queue.submit(pipeline_id="dag2")
+
+        assert exc_info.value.status_code == 503
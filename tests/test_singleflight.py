@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import pytest
+from src.utils.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    def test_do_coalesces_concurrent_threads(self):
+        """Testa que threads concorrentes compartilham uma única execução."""
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(timeout=5)
+            return {"value": 42}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(flight.do("k", fetch)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        while not calls:
+            pass
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert len(calls) == 1
+        assert results == [{"value": 42}] * 5
+
+    def test_do_propagates_errors_and_resets(self):
+        """Testa propagação de exceção e nova execução após a falha."""
+        flight = SingleFlight()
+
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            flight.do("k", fail)
+
+        assert flight.do("k", lambda: "ok") == "ok"
+
+    def test_do_async_coalesces_concurrent_tasks(self):
+        """Testa que tarefas asyncio concorrentes compartilham uma execução."""
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        async def main():
+            return await asyncio.gather(
+                *(flight.do_async("k", fetch) for _ in range(5))
+            )
+
+        results = asyncio.run(main())
+
+        assert len(calls) == 1
+        assert results == ["result"] * 5
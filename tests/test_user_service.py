@@ -1,11 +1,14 @@
 import pytest
 from unittest.mock import Mock, patch
+from fastapi import HTTPException
+from src.services.access_replica import AccessReplica
 from src.services.user_service import UserService
 
 
 class TestUserService:
-    @patch("src.services.user_service.requests.get")
-    def test_get_user_success(self, mock_get):
+    @pytest.mark.asyncio
+    @patch("src.services.user_service.pocketbase.get")
+    async def test_get_user_success(self, mock_get):
         """Testa obtenção de usuário por ID."""
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -15,13 +18,14 @@ class TestUserService:
         }
         mock_get.return_value = mock_response
 
-        result = UserService.get_user("123")
+        result = await UserService.get_user("123")
 
         assert result["id"] == "123"
         assert result["username"] == "testuser"
 
-    @patch("src.services.user_service.requests.get")
-    def test_get_users_paginated(self, mock_get):
+    @pytest.mark.asyncio
+    @patch("src.services.user_service.pocketbase.get")
+    async def test_get_users_paginated(self, mock_get):
         """Testa listagem paginada de usuários."""
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -43,14 +47,15 @@ class TestUserService:
         }
         mock_get.return_value = mock_response
 
-        result = UserService.get_users(page=1, per_page=30)
+        result = await UserService.get_users(page=1, per_page=30)
 
         assert result["page"] == 1
         assert result["totalItems"] == 100
         assert len(result["users"]) == 1
 
-    @patch("src.services.user_service.requests.post")
-    def test_create_user_success(self, mock_post):
+    @pytest.mark.asyncio
+    @patch("src.services.user_service.pocketbase.post")
+    async def test_create_user_success(self, mock_post):
         """Testa criação de usuário."""
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -60,23 +65,25 @@ class TestUserService:
         }
         mock_post.return_value = mock_response
 
-        result = UserService.create_user(
+        result = await UserService.create_user(
             "newuser", "new@test.com", "password", "password", "user"
         )
 
         assert result["id"] == "123"
         assert result["username"] == "newuser"
 
-    def test_create_user_password_mismatch(self):
+    @pytest.mark.asyncio
+    async def test_create_user_password_mismatch(self):
         """Testa criação de usuário com senhas diferentes."""
-        result = UserService.create_user(
+        result = await UserService.create_user(
             "newuser", "new@test.com", "password", "different", "user"
         )
 
         assert "error" in result
 
-    @patch("src.services.user_service.requests.patch")
-    def test_update_user_success(self, mock_patch):
+    @pytest.mark.asyncio
+    @patch("src.services.user_service.pocketbase.patch")
+    async def test_update_user_success(self, mock_patch):
         """Testa atualização de usuário."""
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -87,17 +94,155 @@ class TestUserService:
         mock_patch.return_value = mock_response
 
         update_data = {"username": "updateduser"}
-        result = UserService.update_user("123", update_data)
+        result = await UserService.update_user("123", update_data)
 
         assert result["username"] == "updateduser"
 
-    @patch("src.services.user_service.requests.delete")
-    def test_delete_user_success(self, mock_delete):
+    @pytest.mark.asyncio
+    @patch("src.services.user_service.pocketbase.delete")
+    async def test_delete_user_success(self, mock_delete):
         """Testa exclusão de usuário."""
         mock_response = Mock()
         mock_response.status_code = 204
         mock_delete.return_value = mock_response
 
-        result = UserService.delete_user("123")
+        result = await UserService.delete_user("123")
 
         assert result["message"] == "User deleted successfully"
+
+    @pytest.mark.asyncio
+    @patch("src.services.user_service.pocketbase.list_all")
+    async def test_get_user_group_ids_skips_removed_groups(self, mock_list_all):
+        """Testa que vínculos sem grupo expandido são ignorados."""
+        mock_list_all.return_value = [
+            {"group_id": "g1", "expand": {"group_id": {"id": "g1"}}},
+            {"group_id": "g2"},
+            {"group_id": "g1", "expand": {"group_id": {"id": "g1"}}},
+        ]
+
+        result = await UserService.get_user_group_ids("user123")
+
+        assert result == ["g1"]
+        mock_list_all.assert_awaited_once_with(
+            "groups_users", filter="user_id='user123'", expand="group_id"
+        )
+
+    @pytest.mark.asyncio
+    @patch("src.services.user_service.pocketbase.get")
+    async def test_get_user_groups_from_replica(self, mock_get):
+        """Testa que os grupos do usuário vêm da réplica quando disponível."""
+        replica = AccessReplica()
+        replica.apply("groups", "create", {"id": "g1", "name": "Group 1"})
+        for membership_id, group_id in (("m1", "g1"), ("m2", "gone")):
+            replica.apply(
+                "groups_users",
+                "create",
+                {"id": membership_id, "group_id": group_id, "user_id": "u1"},
+            )
+        replica.ready = True
+
+        with patch("src.services.user_service.access_replica", replica):
+            result = await UserService.get_user_groups("u1")
+
+        assert [group["id"] for group in result["groups"]] == ["g1"]
+        mock_get.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("src.clients.pocketbase.settings.POCKETBASE_PAGE_SIZE", 2)
+    @patch("src.services.user_service.pocketbase.get")
+    async def test_get_user_groups_expands_all_pages(self, mock_get):
+        """Testa a busca dos grupos expandidos em todas as páginas."""
+
+        def membership(group_id):
+            return {"group_id": group_id, "expand": {"group_id": {"id": group_id}}}
+
+        pages = {
+            1: [membership("g1"), membership("g2")],
+            2: [membership("g3")],
+        }
+
+        def page(path, params):
+            assert params["expand"] == "group_id"
+            response = Mock()
+            response.json.return_value = {"items": pages[params["page"]]}
+            return response
+
+        mock_get.side_effect = page
+
+        result = await UserService.get_user_groups("user123")
+
+        assert [group["id"] for group in result["groups"]] == ["g1", "g2", "g3"]
+        assert result["total"] == 3
+        assert mock_get.call_count == 2
+
+    @pytest.mark.asyncio
+    @patch("src.services.user_service.pocketbase.list_any")
+    async def test_get_users_by_ids_keys_results_by_id(self, mock_list_any):
+        """Testa a busca em lote de usuários indexada por id."""
+        mock_list_any.return_value = [{"id": "u2", "username": "user2"}]
+
+        result = await UserService.get_users_by_ids(["u1", " u2", "u1", ""])
+
+        assert result["users"]["u2"]["username"] == "user2"
+        assert result["missing"] == ["u1"]
+        mock_list_any.assert_awaited_once_with("auth_users", "id", ["u1", "u2"])
+
+    @pytest.mark.asyncio
+    @patch("src.services.user_service.settings.USER_BATCH_MAX_IDS", 2)
+    async def test_get_users_by_ids_rejects_too_many_ids(self):
+        """Testa o limite de ids por requisição."""
+        with pytest.raises(HTTPException) as exc_info:
+            await UserService.get_users_by_ids(["u1", "u2", "u3"])
+
+        assert exc_info.value.status_code == 400
+
+    @pytest.mark.asyncio
+    @patch("src.services.user_service.pocketbase.get")
+    async def test_get_users_after_walks_pages_by_cursor(self, mock_get):
+        """Testa a paginação por cursor em (created, id) sem contagem total."""
+        users = [
+            {"id": f"u{i}", "created": f"2024-01-0{i} 00:00:00.000Z"}
+            for i in range(1, 4)
+        ]
+
+        def page(path, params):
+            assert params["skipTotal"] == 1 and params["sort"] == "created,id"
+            start = 0
+            if "filter" in params:
+                start = next(
+                    i + 1
+                    for i, user in enumerate(users)
+                    if f"id>'{user['id']}'" in params["filter"]
+                )
+            response = Mock()
+            response.json.return_value = {
+                "items": users[start : start + params["perPage"]]
+            }
+            return response
+
+        mock_get.side_effect = page
+
+        first = await UserService.get_users_after("", per_page=2)
+        second = await UserService.get_users_after(first["next_cursor"], per_page=2)
+
+        assert [user["id"] for user in first["users"]] == ["u1", "u2"]
+        assert [user["id"] for user in second["users"]] == ["u3"]
+        assert second["next_cursor"] is None
+        assert "totalItems" not in first
+
+    @pytest.mark.asyncio
+    async def test_get_users_after_rejects_invalid_cursor(self):
+        """Testa a recusa de um cursor malformado."""
+        with pytest.raises(HTTPException) as exc_info:
+            await UserService.get_users_after("not-a-cursor")
+
+        assert exc_info.value.status_code == 400
+
+    @pytest.mark.asyncio
+    @patch("src.services.user_service.settings.POCKETBASE_MAX_PER_PAGE", 500)
+    async def test_get_users_after_rejects_page_size_at_server_limit(self):
+        """Testa o 400 quando perPage + 1 passaria do limite do PocketBase."""
+        with pytest.raises(HTTPException) as exc_info:
+            await UserService.get_users_after("", per_page=500)
+
+        assert exc_info.value.status_code == 400